@@ -0,0 +1,219 @@
+#!/usr/bin/python
+###########################################################################################
+#   agegradetable - age grade factors precomputed for a distance
+#
+#       Date            Author          Reason
+#       ----            ------          ------
+#       10/19/26        Lou King        Create
+#
+#   Copyright 2026 Lou King
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+###########################################################################################
+'''
+agegradetable - age grade factors precomputed for a distance
+================================================================
+
+:meth:`loutilities.agegrade.AgeGrade.agegrade` interpolates the age grade factor and open
+standard for the distance on every call.  These depend only on distance, gender and age,
+so an :class:`AgeGradeTable` gets them once for each gender and age MINAGE to MAXAGE,
+and grading a result is then a lookup and a multiply.
+
+For each gender and age, the table holds the age grade factor and the age performance
+percentage for a time of one second, i.e., 100 * openstd / factor.  For a result time,
+
+    * agpercent = agpct1 / time
+    * agtime = time * factor
+
+which are the same calculations :meth:`AgeGrade.agegrade` makes.
+
+Tables are kept for all the distances used in a process, so they are only built once per
+process.  Tables may also be saved between runs, by passing cachedir=CACHEDIR.  Saved tables
+are keyed by distance and a hash of the age grade data and loutilities version.
+'''
+
+# standard
+import pdb
+import argparse
+import os
+import os.path
+import hashlib
+import pickle
+from array import array
+
+# pypi
+
+# github
+
+# other
+import loutilities
+from loutilities import agegrade
+
+# home grown
+from .config import CONFIGDIR
+from . import version
+from .filecache import loadcache, savecache
+
+# tables may be cached in CACHEDIR, keyed by (age grade data and loutilities version hash, distance, TABLEVERSION)
+# TABLEVERSION must be incremented whenever a change could change the tables
+CACHEDIR = os.path.join(CONFIGDIR,'agegradecache')
+TABLEVERSION = 2
+
+# ages in the table.  Ages outside of this range are graded as MINAGE or MAXAGE, as AgeGrade does
+MINAGE = 5
+MAXAGE = 100
+
+# tables built in this process {(agegradedata hash, distance): {gender: (agpct1s, factors), ...}, ...}
+_tables = {}
+
+# age grade data hash for each AgeGrade object {id(ag): (ag, hash), ...}
+_aghashes = {}
+
+#----------------------------------------------------------------------
+def _aghash(ag):
+#----------------------------------------------------------------------
+    '''
+    return hash of the age grade data for an AgeGrade object, and of the loutilities version
+
+    the calculations are in loutilities.agegrade, so a new version of loutilities could change
+    the tables.  If loutilities has no __version__, the modification time of agegrade is used
+
+    :param ag: loutilities.agegrade.AgeGrade object
+    :rtype: hex digest
+    '''
+    # ag is kept in _aghashes so that its id isn't reused
+    if id(ag) not in _aghashes:
+        agversion = getattr(loutilities,'__version__',None) or os.stat(agegrade.__file__).st_mtime_ns
+        aghash = hashlib.sha1(pickle.dumps((ag.agegradedata,agversion),pickle.HIGHEST_PROTOCOL))
+        _aghashes[id(ag)] = (ag, aghash.hexdigest())
+    return _aghashes[id(ag)][1]
+
+########################################################################
+class AgeGradeTable():
+########################################################################
+    '''
+    age grade factors for all ages and genders at one distance
+
+    tables for a gender are built when the gender is first graded.  An unknown gender
+    raises loutilities.agegrade.parameterError, as for AgeGrade
+
+    :param distance: distance (miles)
+    :param ag: loutilities.agegrade.AgeGrade object, default is AgeGrade from configuration
+    :param cachedir: directory for table cache, e.g., CACHEDIR.  Default None, tables are not saved
+    '''
+    #----------------------------------------------------------------------
+    def __init__(self,distance,ag=None,cachedir=None):
+    #----------------------------------------------------------------------
+        self.distance = distance
+        self.ag = ag if ag is not None else agegrade.AgeGrade()
+
+        key = (_aghash(self.ag),distance)
+        self.cachefile = None
+        if cachedir:
+            self.cachefile = os.path.join(cachedir,'{0}-{1!r}-v{2}.pickle'.format(key[0],distance,TABLEVERSION))
+
+        # tables are shared with other AgeGradeTable objects for the same distance
+        if key not in _tables:
+            _tables[key] = (self.cachefile and loadcache(self.cachefile)) or {}
+        self.tables = _tables[key]
+
+    #----------------------------------------------------------------------
+    def _gettable(self,gen):
+    #----------------------------------------------------------------------
+        '''
+        return the table for a gender, building it if necessary
+
+        :param gen: gender
+        :rtype: (agpct1s, factors) - array('d') for each age MINAGE to MAXAGE
+        '''
+        gen = gen.upper()
+        if gen not in self.tables:
+            agpct1s = array('d')
+            factors = array('d')
+            for age in range(MINAGE,MAXAGE+1):
+                agpct1,agtime1,factor = self.ag.agegrade(age,gen,self.distance,1.0)
+                agpct1s.append(agpct1)
+                factors.append(factor)
+            self.tables[gen] = (agpct1s,factors)
+            if self.cachefile:
+                savecache(self.cachefile,self.tables)
+
+        return self.tables[gen]
+
+    #----------------------------------------------------------------------
+    def agegrade(self,age,gen,time):
+    #----------------------------------------------------------------------
+        '''
+        returns age grade statistics for one result
+
+        :param age: integer age
+        :param gen: gender
+        :param time: time for distance (seconds)
+        :rtype: (age performance percentage, age graded result, age grade factor), as for AgeGrade.agegrade
+        '''
+        agpct1s,factors = self._gettable(gen)
+        agendx = min(max(int(age),MINAGE),MAXAGE) - MINAGE
+        return agpct1s[agendx]/time, time*factors[agendx], factors[agendx]
+
+    #----------------------------------------------------------------------
+    def grade(self,ages,genders,times):
+    #----------------------------------------------------------------------
+        '''
+        returns age grade statistics for a column of results
+
+        :param ages: sequence of integer ages
+        :param genders: sequence of genders, in same order as ages
+        :param times: sequence of times (seconds), in same order as ages
+        :rtype: (agpercents, agtimes, agfactors) - array('d') for each, in same order as ages
+        '''
+        agendxs = [min(max(int(age),MINAGE),MAXAGE) - MINAGE for age in ages]
+        gentables = [self._gettable(gen) for gen in genders]
+        agfactors = array('d',[factors[agendx] for (agpct1s,factors),agendx in zip(gentables,agendxs)])
+        agpercents = array('d',[agpct1s[agendx]/time for (agpct1s,factors),agendx,time in zip(gentables,agendxs,times)])
+        agtimes = array('d',[time*factor for time,factor in zip(times,agfactors)])
+        return agpercents,agtimes,agfactors
+
+    #----------------------------------------------------------------------
+    def result(self,age,gen,agpc):
+    #----------------------------------------------------------------------
+        '''
+        returns the result time which gives an age grade percentage
+
+        :param age: integer age
+        :param gen: gender
+        :param agpc: age grade percentage - between 0 and 100
+        :rtype: result in seconds
+        '''
+        agpct1s,factors = self._gettable(gen)
+        agendx = min(max(int(age),MINAGE),MAXAGE) - MINAGE
+        return agpct1s[agendx]/agpc
+
+#----------------------------------------------------------------------
+def main():
+#----------------------------------------------------------------------
+    parser = argparse.ArgumentParser(version='{0} {1}'.format('runningclub',version.__version__))
+    parser.add_argument('distance',help='distance (miles)',type=float)
+    parser.add_argument('gender',help='gender, "M" or "F"')
+    args = parser.parse_args()
+
+    agtable = AgeGradeTable(args.distance)
+    agpct1s,factors = agtable._gettable(args.gender)
+    for agendx in range(len(factors)):
+        print('{0}: factor {1:.4f}, 100% time {2:.1f}'.format(MINAGE+agendx,factors[agendx],agpct1s[agendx]/100.0))
+
+# ##########################################################################################
+#	__main__
+# ##########################################################################################
+if __name__ == "__main__":
+    main()
@@ -32,16 +32,23 @@ import argparse
 import datetime
 import difflib
 import csv
+import threading
 
 # pypi
 #from IPython.core.debugger import Tracer; debughere = Tracer(); debughere() # set breakpoint where needed
+try:
+    from rapidfuzz import process as rfprocess
+    from rapidfuzz import fuzz as rffuzz
+except ImportError:     # optional -- see RapidfuzzScorer
+    rfprocess = None
 
 # github
 
 # home grown
 from . import version
 from . import racedb
-from loutilities import timeu, csvwt
+from . import xlreader
+from loutilities import timeu
 
 # exceptions for this module.  See __init__.py for package exceptions
 
@@ -50,9 +57,91 @@ tYmd = timeu.asctime('%Y-%m-%d')
 tHMS = timeu.asctime('%H:%M:%S')
 tMS  = timeu.asctime('%M:%S')
 
+########################################################################
+class DifflibScorer():
+########################################################################
+    '''
+    reference name similarity scorer, using difflib.SequenceMatcher ratio
+    
+    cutoff values throughout the package are defined in terms of this ratio.
+    Scorers may be shared between threads
+    '''
+    name = 'difflib'
+    
+    #----------------------------------------------------------------------
+    def __init__(self):
+    #----------------------------------------------------------------------
+        # SequenceMatcher to determine matching ratio, which can be used to evaluate CUTOFF value
+        # set_seqs() changes the SequenceMatcher, so each thread gets its own
+        self._local = threading.local()
+    
+    #----------------------------------------------------------------------
+    def ratio(self,a,b):
+    #----------------------------------------------------------------------
+        '''
+        return the SequenceMatcher ratio for two strings
+        
+        :rettype: float in range [0,1]
+        '''
+        sm = getattr(self._local,'sm',None)
+        if sm is None:
+            sm = self._local.sm = difflib.SequenceMatcher()
+        sm.set_seqs(a,b)
+        return sm.ratio()
+    
+    #----------------------------------------------------------------------
+    def closematches(self,word,possibilities,n=3,cutoff=0.6):
+    #----------------------------------------------------------------------
+        '''
+        return list of the best matches for word within possibilities, best first
+        
+        :param word: string to match
+        :param possibilities: list of strings to match against
+        :param n: maximum number of matches to return
+        :param cutoff: float in [0,1], possibilities which score less than this are ignored
+        :rtype: list of strings from possibilities
+        '''
+        return difflib.get_close_matches(word,possibilities,n,cutoff)
 
-# SequenceMatcher to determine matching ratio, which can be used to evaluate CUTOFF value
-sm = difflib.SequenceMatcher()
+########################################################################
+class RapidfuzzScorer(DifflibScorer):
+########################################################################
+    '''
+    name similarity scorer using rapidfuzz's C implementation, if installed
+    
+    rapidfuzz's ratio is Indel similarity, 2*LCS/(len(a)+len(b)), which is never less than the
+    SequenceMatcher ratio.  So it is used to prefilter possibilities at the same cutoff, and only
+    the survivors are scored with the reference ratio.  Results are the same as :class:`DifflibScorer`,
+    see :func:`calibratescorer`
+    '''
+    name = 'rapidfuzz'
+    
+    # allow for float rounding in rapidfuzz's 0-100 scale
+    EPSILON = 1e-6
+    
+    #----------------------------------------------------------------------
+    def closematches(self,word,possibilities,n=3,cutoff=0.6):
+    #----------------------------------------------------------------------
+        candidates = rfprocess.extract(word,possibilities,scorer=rffuzz.ratio,processor=None,
+                                       limit=None,score_cutoff=max(cutoff*100-self.EPSILON,0))
+        return difflib.get_close_matches(word,[c[0] for c in candidates],n,cutoff)
+
+# use fast scorer automatically if it's installed
+if rfprocess is not None:
+    scorer = RapidfuzzScorer()
+else:
+    scorer = DifflibScorer()
+
+#----------------------------------------------------------------------
+def setscorer(newscorer):
+#----------------------------------------------------------------------
+    '''
+    set the scorer used for name matching within this module
+    
+    :param newscorer: DifflibScorer-like object
+    '''
+    global scorer
+    scorer = newscorer
 
 #----------------------------------------------------------------------
 def getratio(a,b):
@@ -62,8 +151,170 @@ def getratio(a,b):
     
     :rettype: float in range [0,1]
     '''
-    sm.set_seqs(a,b)
-    return sm.ratio()
+    return scorer.ratio(a,b)
+
+#----------------------------------------------------------------------
+def calibratescorer(testscorer,names,cutoff):
+#----------------------------------------------------------------------
+    '''
+    check a scorer against the reference :class:`DifflibScorer` using every pair of names,
+    and map the cutoff to the scorer's own scale
+    
+    :param testscorer: DifflibScorer-like object
+    :param names: list of names, e.g., from ClubMember.getmembers()
+    :param cutoff: reference cutoff
+    :rtype: {'pairs':numpairs,'mismatches':[(name,matches,refmatches),...],'fastcutoff':lowest rapidfuzz ratio/100 of any pair at or above cutoff, or None}
+    '''
+    reference = DifflibScorer()
+    
+    # closematches must give the same result as the reference
+    mismatches = []
+    for name in names:
+        matches = testscorer.closematches(name,names,cutoff=cutoff)
+        refmatches = reference.closematches(name,names,cutoff=cutoff)
+        if matches != refmatches:
+            mismatches.append((name,matches,refmatches))
+    
+    # equivalent cutoff for the fast ratio, if available
+    fastcutoff = None
+    numpairs = 0
+    for i in range(len(names)):
+        for j in range(i+1,len(names)):
+            numpairs += 1
+            if rfprocess is None: continue
+            if reference.ratio(names[i],names[j]) >= cutoff:
+                fastratio = rffuzz.ratio(names[i],names[j]) / 100.0
+                if fastcutoff is None or fastratio < fastcutoff:
+                    fastcutoff = fastratio
+    
+    return {'pairs':numpairs,'mismatches':mismatches,'fastcutoff':fastcutoff}
+
+########################################################################
+class MemberMatch():
+########################################################################
+    '''
+    result of :meth:`ClubMember.matchmember`, so that matching doesn't depend on
+    state kept in the ClubMember between calls
+    
+    :param pool: ClubMember which was searched
+    :param name: name which was searched for
+    :param age: age which was matched for
+    :param asofdate: 'yyyy-mm-dd' date for which age was matched
+    :param record: :class:`MemberRecord` for matching member, or None
+    '''
+    #----------------------------------------------------------------------
+    def __init__(self,pool,name,age,asofdate,record):
+    #----------------------------------------------------------------------
+        self.pool = pool
+        self.name = name
+        self.age = age
+        self.asofdate = asofdate
+        self.record = record
+        
+        # (name,dateofbirth) for matching member, or None
+        self.found = (record.name,record.dob) if record else None
+        self.missedmatches = None
+    
+    #----------------------------------------------------------------------
+    def getmissedmatches(self):
+    #----------------------------------------------------------------------
+        '''
+        return list of members close to the requested name, but which did not match age
+        
+        the wider search for these is only done the first time this is called
+        
+        :rtype: [{'name':requestedname,'asofdate':asofdate,'age':age,'dbname':membername,'dob':memberdob}, ...]
+        '''
+        if self.missedmatches is None:
+            self.missedmatches = self.pool._findmissed(self.name,self.age,self.asofdate)
+        return self.missedmatches
+
+#----------------------------------------------------------------------
+def asofkey(asofdate):
+#----------------------------------------------------------------------
+    '''
+    parse an as of date once, for use with :meth:`MemberRecord.ageasof`
+    
+    :param asofdate: 'yyyy-mm-dd' date
+    :rtype: (year, month*100+day)
+    '''
+    asofdate_dt = tYmd.asc2dt(asofdate)
+    return asofdate_dt.year, asofdate_dt.month*100 + asofdate_dt.day
+
+########################################################################
+class MemberRecord():
+########################################################################
+    '''
+    compact member entry within a :class:`ClubMember` pool
+    
+    date of birth is kept as the yyyy-mm-dd string for reporting, and is also
+    carried as integers so age checks don't need to parse any dates.  Dict style
+    access (e.g., member['dob']) is supported for older callers
+    
+    members which come from the database (see :class:`DbClubMember`) also carry the runner's
+    id and flags, so callers don't need to query the database for the runner after a match
+    
+    :param name: member's name
+    :param dob: yyyy-mm-dd date of birth, or '' if not known
+    :param gender: M or F -- only the first character is kept
+    :param hometown: City, ST
+    :param runnerid: racedb.Runner id, or None if not known
+    :param member: racedb.Runner member flag, or None if not known
+    :param active: racedb.Runner active flag, or None if not known
+    '''
+    __slots__ = ('name','dob','dobord','dobyear','dobmd','gender','hometown','runnerid','member','active')
+    
+    #----------------------------------------------------------------------
+    def __init__(self,name,dob,gender,hometown,runnerid=None,member=None,active=None):
+    #----------------------------------------------------------------------
+        self.name = name
+        self.dob = dob
+        self.gender = gender[:1]    # single character strings are cached by python, so this costs a byte
+        self.hometown = hometown
+        self.runnerid = runnerid
+        self.member = member
+        self.active = active
+        
+        # dobord is date.toordinal(), dobyear and dobmd are used for age calculation
+        # all None if dob is invalid or missing
+        try:
+            dob_dt = tYmd.asc2dt(dob)
+            self.dobord = dob_dt.toordinal()
+            self.dobyear = dob_dt.year
+            self.dobmd = dob_dt.month*100 + dob_dt.day
+        except ValueError:
+            self.dobord = None
+            self.dobyear = None
+            self.dobmd = None
+    
+    #----------------------------------------------------------------------
+    def __getitem__(self,key):
+    #----------------------------------------------------------------------
+        try:
+            return getattr(self,key)
+        except AttributeError:
+            raise KeyError(key)
+    
+    #----------------------------------------------------------------------
+    def __repr__(self):
+    #----------------------------------------------------------------------
+        return "<MemberRecord('%s','%s','%s','%s')>" % (self.name, self.dob, self.gender, self.hometown)
+    
+    #----------------------------------------------------------------------
+    def ageasof(self,asofyear,asofmd):
+    #----------------------------------------------------------------------
+        '''
+        return member's age as of a date, without any string parsing
+        
+        :param asofyear: year of as of date
+        :param asofmd: month*100+day of as of date, see :func:`asofkey`
+        :rtype: age, or None if member's dob is not known
+        '''
+        if self.dobyear is None:
+            return None
+        
+        # note below that True==1 and False==0
+        return asofyear - self.dobyear - int(asofmd < self.dobmd)
 
 ########################################################################
 class ClubMember():
@@ -71,25 +322,43 @@ class ClubMember():
     '''
     ClubMember object 
     
-    first row in filename has at least First,Last,DOB,Gender,City,State
+    first row in filename has at least First,Last,DOB,Gender,City,State, and optionally RunnerId,Member,Active
     
-    :params csvfile: csv file from which club members are to be retrieved
+    :params csvfile: csv file from which club members are to be retrieved, or iterable of dict rows with the same keys
     :params cutoff: cutoff for getmember.  float in (0,1].  higher means strings have to match more closely to be considered "close".  Default 0.6
+    :params missedtolerance: max age difference (years) for getmissedmatches() entries, None means any age.  Default None
     '''
     #----------------------------------------------------------------------
-    def __init__(self,csvfile,cutoff=0.6,exceldates=True):
+    def __init__(self,csvfile,cutoff=0.6,exceldates=True,missedtolerance=None):
     #----------------------------------------------------------------------
-        _IN = open(csvfile,'r',newline='')
-        IN = csv.DictReader(_IN)
+        # rows may be given directly, e.g., streamed by XlClubMember
+        if isinstance(csvfile, str):
+            _IN = open(csvfile,'r',newline='')
+            IN = csv.DictReader(_IN)
+        else:
+            _IN = None
+            IN = csvfile
         
         # collect member information by member name
         self.members = {}
         self.exceldates = exceldates
         
+        # member names are also indexed by birth year, so findmember() only needs to score plausible ages
+        # members with unknown dob are under None
+        self.yearbuckets = {}
+        
         # set getmember cutoff.  This is a float within (0,1]
         # higher means strings have to match more closely to be considered "close"
         self.cutoff = cutoff
         
+        # missed matches are collected from a wider search, only when asked for
+        # the last match is kept per thread for self.getmissedmatches()
+        self.missedtolerance = missedtolerance
+        self._local = threading.local()
+        
+        # protects self.members and self.yearbuckets against add_member(), etc.
+        self._lock = threading.RLock()
+        
         # read each row in input file, and create the member data structure
         for thisrow in IN:
             # allow First or GivenName; allow Last or FamilyName; throw error for First, Last keys
@@ -99,21 +368,146 @@ class ClubMember():
             last = last.strip()
             
             name = ' '.join([first,last])
-            thismember = {}
-            thismember['name'] = name.strip()
-            if thismember['name'] == '': break   # assume first blank 'name' is the end of the data
+            if name.strip() == '': break   # assume first blank 'name' is the end of the data
 
             dob = self.file2ascdate(thisrow['DOB'])
-            thismember['dob'] = dob
-            thismember['gender'] = thisrow['Gender'].upper().strip()
-            thismember['hometown'] = ', '.join([thisrow['City'].strip(),thisrow['State'].strip()])
+            gender = thisrow['Gender'].upper().strip()
+            hometown = ', '.join([thisrow['City'].strip(),thisrow['State'].strip()])
+            thismember = MemberRecord(name.strip(),dob,gender,hometown,thisrow.get('RunnerId'),thisrow.get('Member'),thisrow.get('Active'))
             
             # make self.memberskeys lower case
             # lower case comparisons are always done, to avoid UPPER NAME issue, and any other case related issues
             lowername = name.lower()
-            if lowername not in self.members:
-                self.members[lowername] = []
-            self.members[lowername].append(thismember)    # allows for possibility that multiple members have same name
+            self._index(lowername,thismember)
+        
+        if _IN is not None:
+            _IN.close()
+
+    #----------------------------------------------------------------------
+    def __getstate__(self):
+    #----------------------------------------------------------------------
+        '''
+        pool may be pickled, e.g., to send to a worker process which is spawned
+
+        the lock and per thread state can't be pickled, and are recreated by __setstate__
+        '''
+        state = self.__dict__.copy()
+        del state['_local']
+        del state['_lock']
+        return state
+
+    #----------------------------------------------------------------------
+    def __setstate__(self,state):
+    #----------------------------------------------------------------------
+        self.__dict__.update(state)
+        self._local = threading.local()
+        self._lock = threading.RLock()
+
+    #----------------------------------------------------------------------
+    def _index(self,lowername,thismember):
+    #----------------------------------------------------------------------
+        '''
+        add member to self.members and self.yearbuckets
+        
+        :param lowername: lower case name, key for self.members
+        :param thismember: MemberRecord
+        '''
+        # allows for possibility that multiple members have same name
+        # list is replaced rather than appended to, so a list being read in another thread never changes
+        self.members[lowername] = self.members.get(lowername,[]) + [thismember]
+        if thismember.dobyear not in self.yearbuckets:
+            self.yearbuckets[thismember.dobyear] = set()
+        self.yearbuckets[thismember.dobyear].add(lowername)
+    
+    #----------------------------------------------------------------------
+    def _unindex(self,lowername,dob):
+    #----------------------------------------------------------------------
+        '''
+        remove members with this name and dob from self.members and self.yearbuckets
+        
+        :param lowername: lower case name, key for self.members
+        :param dob: yyyy-mm-dd date of birth, or ''
+        :rtype: list of removed MemberRecords
+        '''
+        thesemembers = self.members.get(lowername,[])
+        removed = [m for m in thesemembers if m.dob == dob]
+        if not removed:
+            return removed
+        
+        remaining = [m for m in thesemembers if m.dob != dob]
+        if remaining:
+            self.members[lowername] = remaining
+        else:
+            self.members.pop(lowername)
+        
+        # name stays in a year bucket if another member with the same name was born that year
+        remainingyears = set([m.dobyear for m in remaining])
+        for m in removed:
+            if m.dobyear not in remainingyears:
+                self.yearbuckets[m.dobyear].discard(lowername)
+        
+        return removed
+    
+    #----------------------------------------------------------------------
+    def add_member(self,name,dob,gender,hometown,runnerid=None,member=None,active=None):
+    #----------------------------------------------------------------------
+        '''
+        add a member to the pool, e.g., when a runner is added to the database during an import
+        
+        :param name: member's name
+        :param dob: yyyy-mm-dd date of birth, or '' if not known
+        :param gender: M or F
+        :param hometown: City, ST
+        :param runnerid: racedb.Runner id, or None if not known, e.g., not added to database yet
+        :param member: racedb.Runner member flag, or None if not known
+        :param active: racedb.Runner active flag, or None if not known
+        :rtype: MemberRecord which was added
+        '''
+        thismember = MemberRecord(name.strip(),dob,gender.upper().strip(),hometown,runnerid,member,active)
+        with self._lock:
+            self._index(name.lower(),thismember)
+        return thismember
+    
+    #----------------------------------------------------------------------
+    def remove_member(self,name,dob):
+    #----------------------------------------------------------------------
+        '''
+        remove a member from the pool
+        
+        :param name: member's name
+        :param dob: yyyy-mm-dd date of birth, or '' if not known
+        :rtype: True if member was found and removed
+        '''
+        with self._lock:
+            removed = self._unindex(name.lower(),dob)
+        return len(removed) > 0
+    
+    #----------------------------------------------------------------------
+    def update_member(self,name,dob,newname,newdob,gender,hometown,runnerid=None,member=None,active=None):
+    #----------------------------------------------------------------------
+        '''
+        update a member in the pool, e.g., when a runner's name or date of birth is changed in the database
+        
+        if the member was not in the pool, it is added
+        
+        :param name: member's name before the update
+        :param dob: member's yyyy-mm-dd date of birth before the update, or ''
+        :param newname: member's name
+        :param newdob: yyyy-mm-dd date of birth, or '' if not known
+        :param gender: M or F
+        :param hometown: City, ST
+        :param runnerid: racedb.Runner id, default is the id from the member before the update
+        :param member: racedb.Runner member flag, default is the flag from the member before the update
+        :param active: racedb.Runner active flag, default is the flag from the member before the update
+        :rtype: MemberRecord which was updated
+        '''
+        with self._lock:
+            removed = self._unindex(name.lower(),dob)
+            if removed:
+                if runnerid is None: runnerid = removed[0].runnerid
+                if member is None: member = removed[0].member
+                if active is None: active = removed[0].active
+            return self.add_member(newname,newdob,gender,hometown,runnerid,member,active)
     
     #----------------------------------------------------------------------
     def file2ascdate(self,date):
@@ -143,7 +537,7 @@ class ClubMember():
         '''
         returns dict keyed by names of members, each containing list of member entries with same name
         
-        :rtype: {name.lower():[{'name':name,'dob':dateofbirth,'gender':'M'|'F','hometown':City,ST},...],...}
+        :rtype: {name.lower():[MemberRecord,...],...}
         '''
         
         return self.members
@@ -158,21 +552,54 @@ class ClubMember():
         
         if name wasn't found, {} is returned
         
+        NOTE: 'matchingmembers' is the pool's own list, which must not be modified by the caller
+        
         :param name: name to search for
         :rtype: {'matchingmembers':member record list, 'exactmatch':boolean, 'closematches':member name list}
         '''
         
-        closematches = difflib.get_close_matches(name.lower(),list(self.members.keys()),cutoff=self.cutoff)
+        closematches = self._closekeys(name)
         
         rval = {}
         if len(closematches) > 0:
             topmatch = closematches.pop(0)
             rval['exactmatch'] = (name.lower() == topmatch.lower()) # ignore case
-            rval['matchingmembers'] = self.members[topmatch][:] # make a copy
-            rval['closematches'] = closematches[:]
+            rval['matchingmembers'] = self.members.get(topmatch,[])
+            rval['closematches'] = closematches
             
         return rval
         
+    #----------------------------------------------------------------------
+    def _closekeys(self,name,keys=None):
+    #----------------------------------------------------------------------
+        '''
+        returns list of self.members keys which are close to name, best match first
+        
+        :param name: name to search for
+        :param keys: collection of keys to search within, default is all of self.members
+        :rtype: list of lower case member names
+        '''
+        if keys is None:
+            with self._lock:
+                keys = list(self.members.keys())
+        return scorer.closematches(name.lower(),list(keys),cutoff=self.cutoff)
+        
+    #----------------------------------------------------------------------
+    def _keysforyears(self,years):
+    #----------------------------------------------------------------------
+        '''
+        returns set of self.members keys for members born in any of the indicated years
+        
+        :param years: iterable of birth years, may include None for members with unknown dob
+        :rtype: set of lower case member names
+        '''
+        keys = set()
+        with self._lock:
+            for year in years:
+                if year in self.yearbuckets:
+                    keys |= self.yearbuckets[year]
+        return keys
+        
     #----------------------------------------------------------------------
     def findmember(self,name,age,asofdate):
     #----------------------------------------------------------------------
@@ -188,45 +615,82 @@ class ClubMember():
         :rtype: (name,dateofbirth) or None if not found.  dateofbirth is ascii yyyy-mm-dd
         '''
         
-        # self.missedmatches keeps list of possible matches.  Can be retrieved via self.getmissedmatches()
-        self.missedmatches = []
-        matches = self.getmember(name)
+        match = self.matchmember(name,age,asofdate)
+        self._local.lastmatch = match
+        return match.found
         
-        if not matches: return None
+    #----------------------------------------------------------------------
+    def matchmember(self,name,age,asofdate):
+    #----------------------------------------------------------------------
+        '''
+        like :meth:`findmember`, but missed matches are part of the returned object rather than
+        kept in self, so this can be called concurrently from several threads
         
-        foundmember = False
-        memberage = None
-        checkmembers = iter([matches['matchingmembers'][0]['name']] + matches['closematches'])
-        while not foundmember:
-            try:
-                checkmember = next(checkmembers)
-            except StopIteration:
-                break
-            matches = self.getmember(checkmember)
-            for member in matches['matchingmembers']:
+        :param name: name to search for
+        :param age: age to match for
+        :param asofdate: 'yyyy-mm-dd' date for which age is to be matched
+        :rtype: :class:`MemberMatch`
+        '''
+        
+        # parse the date once, then age check each candidate from its precomputed dob fields
+        asofyear,asofmd = asofkey(asofdate)
+        
+        # only members born in the year which gives this age, or the year before, can match exactly
+        # members with unknown dob match any age
+        years = [None]
+        if isinstance(age,int):
+            years += [asofyear-age, asofyear-age-1]
+        closekeys = self._closekeys(name,self._keysforyears(years))
+        
+        # close matches are keys into self.members, so there's no need to search again for each of them
+        for checkmember in closekeys:
+            for member in self.members.get(checkmember,[]):
                 # assume match for first member of correct age -- TODO: need to do better age checking [what the heck did I mean here?]
-                asofdate_dt = tYmd.asc2dt(asofdate)
-                try:
-                    memberdob = tYmd.asc2dt(member['dob'])
-                    # note below that True==1 and False==0
-                    memberage = asofdate_dt.year - memberdob.year - int((asofdate_dt.month, asofdate_dt.day) < (memberdob.month, memberdob.day))
-                    if memberage == age:
-                        foundmember = True
-                        membername = member['name']
-                    else:
-                        self.missedmatches.append({'name':name,'asofdate':asofdate,'age':age,
-                                                   'dbname':member['name'],'dob':member['dob'],
-                                                   'ratio':getratio(name.strip().lower(),member['name'].strip().lower())})
-                # invalid dob in member database
-                except ValueError:
-                    foundmember = True
-                    membername = member['name']
-                if foundmember: break
+                memberage = member.ageasof(asofyear,asofmd)
                 
-        if foundmember:
-            return membername,member['dob']
+                # invalid dob in member database matches any age
+                if memberage is None or memberage == age:
+                    return MemberMatch(self,name,age,asofdate,member)
+                
+        return MemberMatch(self,name,age,asofdate,None)
+        
+    #----------------------------------------------------------------------
+    def _findmissed(self,name,age,asofdate):
+    #----------------------------------------------------------------------
+        '''
+        returns list of members with names close to name, but which did not match age
+        
+        the search is over the whole pool if self.missedtolerance is None, else only over 
+        members born within self.missedtolerance years of the requested age
+        
+        :param name: name to search for
+        :param age: age to match for
+        :param asofdate: 'yyyy-mm-dd' date for which age is to be matched
+        :rtype: see :meth:`getmissedmatches`
+        '''
+        asofyear,asofmd = asofkey(asofdate)
+        
+        if self.missedtolerance is None:
+            keys = None
+        elif isinstance(age,int):
+            years = list(range(asofyear-age-1-self.missedtolerance, asofyear-age+self.missedtolerance+1))
+            keys = self._keysforyears(years)
         else:
-            return None
+            return []
+        
+        missedmatches = []
+        for checkmember in self._closekeys(name,keys):
+            for member in self.members.get(checkmember,[]):
+                memberage = member.ageasof(asofyear,asofmd)
+                if memberage is None or memberage == age:
+                    continue
+                if self.missedtolerance is not None and abs(memberage-age) > self.missedtolerance:
+                    continue
+                missedmatches.append({'name':name,'asofdate':asofdate,'age':age,
+                                      'dbname':member.name,'dob':member.dob,
+                                      'ratio':getratio(name.strip().lower(),member.name.strip().lower())})
+        
+        return missedmatches
         
     #----------------------------------------------------------------------
     def findname(self,name):
@@ -241,28 +705,27 @@ class ClubMember():
         :rtype: name or None if not found
         '''
         
-        matches = self.getmember(name)
+        record = self.findrecord(name)
+        return record.name if record else None
         
-        if not matches: return None
+    #----------------------------------------------------------------------
+    def findrecord(self,name):
+    #----------------------------------------------------------------------
+        '''
+        like :meth:`findname`, but returns the member's record
         
-        # TODO: this is probably overly complicated due to cut/paste from findmember.  Cleanup would provide first 'matchingmember'
-        foundname = False
-        checkmembers = iter([matches['matchingmembers'][0]['name']] + matches['closematches'])
-        while not foundname:
-            try:
-                checkmember = next(checkmembers)
-            except StopIteration:
-                break
-            matches = self.getmember(checkmember)
-            if len(matches['matchingmembers']) > 0:
-                # assume match for first member found
-                foundname = True
-                membername = matches['matchingmembers'][0]['name']
-                
-        if foundname:
-            return membername
-        else:
-            return None
+        :param name: name to search for
+        :rtype: :class:`MemberRecord` or None if not found
+        '''
+        
+        closekeys = self._closekeys(name)
+        
+        if not closekeys: return None
+        
+        # assume match for first member found
+        matchingmembers = self.members.get(closekeys[0],[])
+        if not matchingmembers: return None
+        return matchingmembers[0]
         
     #----------------------------------------------------------------------
     def getmissedmatches(self):
@@ -270,10 +733,15 @@ class ClubMember():
         '''
         can be called after findmembers() to return list of members found in database, but did not match age
         
+        this refers to the last findmember() call made by the calling thread.  See also :meth:`MemberMatch.getmissedmatches`
+        
         :rtype: [{'name':requestedname,'asofdate':asofdate,'age':age,'dbname':membername,'dob':memberdob}, ...]
         '''
         
-        return self.missedmatches
+        lastmatch = getattr(self._local,'lastmatch',None)
+        if lastmatch is None:
+            return []
+        return lastmatch.getmissedmatches()
     
 ########################################################################
 class XlClubMember(ClubMember):
@@ -283,20 +751,40 @@ class XlClubMember(ClubMember):
     
     :params xlfilename: excel file from which club members are to be retrieved
     :params cutoff: cutoff for getmember.  float in (0,1].  higher means strings have to match more closely to be considered "close".  Default 0.6
+    :params missedtolerance: max age difference (years) for getmissedmatches() entries, None means any age.  Default None
     '''
     
     #----------------------------------------------------------------------
-    def __init__(self,xlfilename,cutoff=0.6):
+    def __init__(self,xlfilename,cutoff=0.6,missedtolerance=None):
     #----------------------------------------------------------------------
-        c = csvwt.Xls2Csv(xlfilename)   # allow automated header conversion
-
-        # retrieve first sheet's csv filename
-        csvfiles = c.getfiles()
-        csvsheets = list(csvfiles.keys())
-        csvfile = csvfiles[csvsheets[0]]
-
+        # rows are streamed from the first sheet, rather than converting the workbook to csv
+        xl = xlreader.XlReader(xlfilename)
+        
         # do all the work
-        ClubMember.__init__(self,csvfile,cutoff=cutoff,exceldates=True)
+        ClubMember.__init__(self,self._xlrows(xl),cutoff=cutoff,exceldates=True,missedtolerance=missedtolerance)
+        
+        # reading stops at the first blank name, so the rest of the sheet isn't needed
+        xl.close()
+        
+    #----------------------------------------------------------------------
+    def _xlrows(self,xl):
+    #----------------------------------------------------------------------
+        '''
+        generate rows from excel file as they would have been read from csv
+        
+        DOB is left as found in the file, for :meth:`file2ascdate`
+        
+        :param xl: :class:`xlreader.XlReader` for the file
+        :rtype: generator of {header:cell, ...}
+        '''
+        for row in xl.dictrows():
+            for key in row:
+                if key == 'DOB':
+                    if row[key] is None:
+                        row[key] = ''
+                elif not isinstance(row[key], str):
+                    row[key] = '' if row[key] is None else str(row[key])
+            yield row
         
 ########################################################################
 class CsvClubMember(ClubMember):
@@ -306,13 +794,14 @@ class CsvClubMember(ClubMember):
     
     :params csvfilename: excel file from which club members are to be retrieved
     :params cutoff: cutoff for getmember.  float in (0,1].  higher means strings have to match more closely to be considered "close".  Default 0.6
+    :params missedtolerance: max age difference (years) for getmissedmatches() entries, None means any age.  Default None
     '''
     
     #----------------------------------------------------------------------
-    def __init__(self,csvfilename,cutoff=0.6):
+    def __init__(self,csvfilename,cutoff=0.6,missedtolerance=None):
     #----------------------------------------------------------------------
         # do all the work
-        ClubMember.__init__(self,csvfilename,cutoff=cutoff,exceldates=False)
+        ClubMember.__init__(self,csvfilename,cutoff=cutoff,exceldates=False,missedtolerance=missedtolerance)
     
 ########################################################################
 class DbClubMember(ClubMember):
@@ -322,65 +811,57 @@ class DbClubMember(ClubMember):
     
     :params dbfilename: database file from which club members are to be retrieved -- default is to use configured database
     :params cutoff: cutoff for getmember.  float in (0,1].  higher means strings have to match more closely to be considered "close".  Default 0.6
+    :params missedtolerance: max age difference (years) for getmissedmatches() entries, None means any age.  Default None
     :params \*\*kwfilter: keyword parameters for racedb.Runner database filter
     '''
     
     #----------------------------------------------------------------------
-    def __init__(self,dbfilename=None,cutoff=0.6,**kwfilter):
+    def __init__(self,dbfilename=None,cutoff=0.6,missedtolerance=None,**kwfilter):
     #----------------------------------------------------------------------
         # create database session
         racedb.setracedb(dbfilename)
         s = racedb.Session()
         
-        # TODO: don't really need this since adding exceldates as parameter to ClubMember, but for now keeping for safety
-        def _dob2excel(s,f):
+        # rows are built directly from the runner table, with the runner's id and flags
+        # note it is ok to split name like this, because it will just get joined together in ClubMember
+        rows = []
+        for runner in s.query(racedb.Runner).filter_by(**kwfilter).all():
             try:
-                xl = tYmd.asc2excel(f)
+                dob = tYmd.dt2asc(tYmd.asc2dt(runner.dateofbirth))
             except ValueError:
-                xl = None
-            return xl
-        
-        def _city(s,f):
-            if f:
-                return ','.join(f.split(',')[0:-1])
-            else:
-                return None
-        
-        def _state(s,f):
-            if f:
-                return lambda s,f: f.split(',')[-1]
-            else:
-                return None
-        
-        # map database table column names to output column names, and optionally function for transformation
-        # function x is x(s,f), where s is session, f is field value
-        # note it is ok to split name like this, because it will just get joined together when the csv is processed in clubmember
-        d = csvwt.Db2Csv()
-        hdrmap = {'dateofbirth':{'DOB':_dob2excel},
-                  'gender':'Gender',
-                  'name':{'First':lambda s,f: ' '.join(f.split(' ')[0:-1]),'Last':lambda s,f: f.split(' ')[-1]},
-                  'hometown':{'City':_city, 'State':_state}
-                    }
-        d.addtable('Sheet1',s,racedb.Runner,hdrmap,**kwfilter)
+                dob = ''
+            hometown = runner.hometown.split(',') if runner.hometown else ['','']
+            rows.append({'First':' '.join(runner.name.split(' ')[0:-1]),'Last':runner.name.split(' ')[-1],
+                         'DOB':dob,'Gender':runner.gender or '',
+                         'City':','.join(hometown[0:-1]),'State':hometown[-1],
+                         'RunnerId':runner.id,'Member':runner.member,'Active':runner.active})
         
         # done with database
         s.close()
-
-        # retrieve first sheet's csv filename
-        csvfiles = d.getfiles()
-        csvsheets = list(csvfiles.keys())
-        csvfile = csvfiles[csvsheets[0]]
         
         # do all the work
-        ClubMember.__init__(self,csvfile,cutoff=cutoff,exceldates=True)
-        
-        ## csv files not needed any more
-        #del d
+        ClubMember.__init__(self,rows,cutoff=cutoff,exceldates=False,missedtolerance=missedtolerance)
     
 #----------------------------------------------------------------------
 def main(): # TODO: Update this for testing
 #----------------------------------------------------------------------
-    pass
+    '''
+    calibrate the configured name matching scorer against the reference scorer
+    '''
+    parser = argparse.ArgumentParser(version='{0} {1}'.format('runningclub',version.__version__))
+    parser.add_argument('memberfile',help='csv file with member information')
+    parser.add_argument('-c','--cutoff',help='cutoff for close match lookup (default %(default)0.2f)',type=float,default=0.7)
+    args = parser.parse_args()
+    
+    members = CsvClubMember(args.memberfile,cutoff=args.cutoff)
+    names = list(members.getmembers().keys())
+    
+    calibration = calibratescorer(scorer,names,args.cutoff)
+    print('scorer {}: {} names, {} pairs, {} mismatches'.format(scorer.name,len(names),calibration['pairs'],len(calibration['mismatches'])))
+    for name,matches,refmatches in calibration['mismatches']:
+        print('   {}: {} expected {}'.format(name,matches,refmatches))
+    if calibration['fastcutoff'] is not None:
+        print('reference cutoff {:0.2f} is rapidfuzz cutoff {:0.2f}'.format(args.cutoff,calibration['fastcutoff']))
     
 # ##########################################################################################
 #	__main__
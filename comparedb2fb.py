@@ -34,27 +34,12 @@ import pdb
 import argparse
 import json
 import csv
-import difflib
 
 # home grown
 from . import version
 from . import racedb
 from . import clubmember
 
-# SequenceMatcher to determine matching ratio, which can be used to evaluate CUTOFF value
-sm = difflib.SequenceMatcher()
-
-#----------------------------------------------------------------------
-def getratio(a,b):
-#----------------------------------------------------------------------
-    '''
-    return the SequenceMatcher ratio for two strings
-    
-    :rettype: float in range [0,1]
-    '''
-    sm.set_seqs(a,b)
-    return sm.ratio()
-
 #----------------------------------------------------------------------
 def findxtraclose(lista,listb,XTRA,CLOSE=None,typea=None,typeb=None): 
 #----------------------------------------------------------------------
@@ -69,7 +54,7 @@ def findxtraclose(lista,listb,XTRA,CLOSE=None,typea=None,typeb=None):
     '''
     
     for ela in lista:
-        closematches = difflib.get_close_matches(ela.lower(),listb,cutoff=0.7)
+        closematches = clubmember.scorer.closematches(ela.lower(),listb,cutoff=0.7)
         
         if len(closematches) == 0:
             XTRA.write('{}\n'.format(ela))
@@ -82,7 +67,7 @@ def findxtraclose(lista,listb,XTRA,CLOSE=None,typea=None,typeb=None):
             for elb in closematches:
                 closerow[typea] = ela
                 closerow[typeb] = elb
-                closerow['ratio'] = getratio(ela,elb)
+                closerow['ratio'] = clubmember.getratio(ela,elb)
                 CLOSE.writerow(closerow)
 
 #----------------------------------------------------------------------
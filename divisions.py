@@ -0,0 +1,362 @@
+#!/usr/bin/python
+###########################################################################################
+#   divisions - map ages to divisions
+#
+#       Date            Author          Reason
+#       ----            ------          ------
+#       10/19/26        Lou King        Create
+#
+#   Copyright 2026 Lou King
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+###########################################################################################
+'''
+divisions - map ages to divisions
+===========================================
+
+A :class:`DivisionMap` is built once from a list of (low, high) age divisions, e.g., from
+a series' :class:`racedb.Divisions` rows or from a range spec like "18-24,10,80".
+The division for every age from 0 to MAXAGE is precomputed into a dense array, so each
+lookup is a single index, and a whole column of ages can be looked up at once.
+
+Ages above MAXAGE are rare, and are looked up by scanning the divisions.
+
+Division placement uses a runner's age as of Jan 1 of the race year.  The division age and
+the division in each series are materialized for all members by :func:`updateseason`, into
+the :class:`racedb.RunnerSeason` table, so these needn't be recomputed for every result.
+'''
+
+# standard
+import pdb
+import argparse
+from array import array
+from collections import OrderedDict
+
+# pypi
+
+# github
+
+# other
+from loutilities import timeu
+
+# home grown
+from .config import parameterError
+from . import version
+from . import racedb
+
+tYmd = timeu.asctime('%Y-%m-%d')
+
+# ages from 0 to MAXAGE are precomputed
+MAXAGE = 120
+
+# division index for ages which aren't in any division
+NODIVISION = -1
+
+# high age used for the open ended last range of a range spec
+OPENAGE = 199
+
+#----------------------------------------------------------------------
+def parserangespec(rangestr):
+#----------------------------------------------------------------------
+    '''
+    parse range spec into divisions and labels
+
+    :param rangestr: initial,delta,final, e.g., 18-24,10,80 means 18-24,25-34,35-44,...,75-79,80+
+    :rtype: ([(low,high), ...], [label, ...])
+    '''
+    try:
+        rangedef = rangestr.split(',')
+        initrange = tuple([int(x) for x in rangedef[0].split('-')])
+        rangedelta = int(rangedef[1])
+        lastage = int(rangedef[2])
+    except (ValueError,IndexError):
+        raise parameterError('invalid range spec {0}, expecting initial,delta,final, e.g., 18-24,10,80'.format(rangestr))
+
+    divisions = [initrange]
+    labels = ['{}-{}'.format(initrange[0], initrange[1])]
+
+    nextage = initrange[1]+1
+    while( nextage < lastage ):
+        rangestart = nextage
+        rangeend   = nextage + rangedelta - 1
+        if rangeend >= lastage:
+            rangeend = lastage-1
+        divisions.append((rangestart, rangeend))
+        labels.append('{}-{}'.format(rangestart, rangeend))
+
+        nextage += rangedelta
+
+    # last range
+    divisions.append((lastage,OPENAGE))
+    labels.append('{}+'.format(lastage))
+
+    return divisions,labels
+
+########################################################################
+class DivisionMap():
+########################################################################
+    '''
+    lookup table from age to division
+
+    if divisions overlap, an age is in the first division which contains it
+
+    :param divisions: list of (low,high) ages, inclusive
+    :param labels: list of labels, in same order as divisions, default is 'low-high'
+    '''
+    #----------------------------------------------------------------------
+    def __init__(self,divisions,labels=None):
+    #----------------------------------------------------------------------
+        self.divisions = [(int(low),int(high)) for low,high in divisions]
+        if labels is None:
+            labels = ['{}-{}'.format(low,high) for low,high in self.divisions]
+        self.labels = list(labels)
+        self.ranges = OrderedDict(zip(self.divisions,self.labels))
+
+        # dense age -> division index table
+        self.table = array('h',[NODIVISION]*(MAXAGE+1))
+        for divndx in range(len(self.divisions)):
+            low,high = self.divisions[divndx]
+            for age in range(max(low,0),min(high,MAXAGE)+1):
+                if self.table[age] == NODIVISION:
+                    self.table[age] = divndx
+
+    #----------------------------------------------------------------------
+    @classmethod
+    def fromdb(cls,session,seriesid):
+    #----------------------------------------------------------------------
+        '''
+        create DivisionMap from active divisions for a series
+
+        :param session: database session
+        :param seriesid: series.id
+        :rtype: DivisionMap, with no divisions if none are configured for the series
+        '''
+        alldivs = session.query(racedb.Divisions).filter_by(seriesid=seriesid,active=True).all()
+        return cls([(div.divisionlow,div.divisionhigh) for div in alldivs])
+
+    #----------------------------------------------------------------------
+    @classmethod
+    def fromspec(cls,rangestr):
+    #----------------------------------------------------------------------
+        '''
+        create DivisionMap from range spec
+
+        :param rangestr: initial,delta,final, e.g., 18-24,10,80 means 18-24,25-34,35-44,...,75-79,80+
+        :rtype: DivisionMap
+        '''
+        return cls(*parserangespec(rangestr))
+
+    #----------------------------------------------------------------------
+    def __len__(self):
+    #----------------------------------------------------------------------
+        return len(self.divisions)
+
+    #----------------------------------------------------------------------
+    def index(self,age):
+    #----------------------------------------------------------------------
+        '''
+        return index of division for age
+
+        :param age: integer age, or None
+        :rtype: index into self.divisions, or NODIVISION
+        '''
+        if age is None or age < 0:
+            return NODIVISION
+        if age <= MAXAGE:
+            return self.table[age]
+
+        # rare, so just scan
+        for divndx in range(len(self.divisions)):
+            low,high = self.divisions[divndx]
+            if low <= age <= high:
+                return divndx
+        return NODIVISION
+
+    #----------------------------------------------------------------------
+    def division(self,age):
+    #----------------------------------------------------------------------
+        '''
+        return division for age
+
+        :param age: integer age, or None
+        :rtype: (low,high) or None if age isn't in a division
+        '''
+        divndx = self.index(age)
+        return self.divisions[divndx] if divndx != NODIVISION else None
+
+    #----------------------------------------------------------------------
+    def __call__(self,age):
+    #----------------------------------------------------------------------
+        '''
+        return label for age
+
+        :param age: integer age, or None
+        :rtype: label or None if age isn't in a division
+        '''
+        divndx = self.index(age)
+        return self.labels[divndx] if divndx != NODIVISION else None
+
+    #----------------------------------------------------------------------
+    def indexes(self,ages):
+    #----------------------------------------------------------------------
+        '''
+        look up division indexes for a column of ages
+
+        :param ages: sequence of integer ages.  None or negative ages are not in any division
+        :rtype: array('h') of division indexes, NODIVISION if not in a division
+        '''
+        table = self.table
+        index = self.index
+        return array('h',[table[age] if age is not None and 0 <= age <= MAXAGE else index(age) for age in ages])
+
+    #----------------------------------------------------------------------
+    def lookup(self,ages):
+    #----------------------------------------------------------------------
+        '''
+        look up divisions for a column of ages
+
+        :param ages: sequence of integer ages, as for :meth:`indexes`
+        :rtype: list of (low,high), None if not in a division
+        '''
+        divisions = self.divisions + [None]
+        return [divisions[divndx] for divndx in self.indexes(ages)]
+
+    #----------------------------------------------------------------------
+    def getranges(self):
+    #----------------------------------------------------------------------
+        '''
+        :rtype: OrderedDict of {(low,high):label, ...}
+        '''
+        return self.ranges
+
+#----------------------------------------------------------------------
+def divage(dob,year):
+#----------------------------------------------------------------------
+    '''
+    return age for division placement, which is age as of Jan 1 of the year
+    
+    :param dob: yyyy-mm-dd date of birth, '' or None if not known
+    :param year: year of season
+    :rtype: integer age, or None if date of birth is not known
+    '''
+    if not dob:
+        return None
+    try:
+        dob = tYmd.asc2dt(dob)
+    except ValueError:
+        return None
+    return year - dob.year - int((1,1) < (dob.month,dob.day))
+
+#----------------------------------------------------------------------
+def updateseason(session,year):
+#----------------------------------------------------------------------
+    '''
+    fill in racedb.RunnerSeason for all members for a season, replacing what was there
+    
+    there is a row for each member with date of birth, for each active series which has divisions.
+    Members who don't give date of birth are not eligible for division awards, so are left out
+    
+    :param session: database session
+    :param year: year of season
+    :rtype: number of rows
+    '''
+    divmaps = []
+    for series in session.query(racedb.Series).filter_by(active=True).all():
+        divmap = DivisionMap.fromdb(session,series.id)
+        if len(divmap) > 0:
+            divmaps.append((series.id,divmap))
+    
+    runnerids = []
+    divages = []
+    for runnerid,dob in session.query(racedb.Runner.id,racedb.Runner.dateofbirth).filter_by(member=True).all():
+        runnerdivage = divage(dob,year)
+        if runnerdivage is not None:
+            runnerids.append(runnerid)
+            divages.append(runnerdivage)
+    
+    # rows are replaced in one batch
+    session.query(racedb.RunnerSeason).filter_by(year=year).delete(synchronize_session=False)
+    rows = []
+    for seriesid,divmap in divmaps:
+        # age 0 is treated as unknown, as for race results
+        for runnerid,runnerdivage,division in zip(runnerids,divages,divmap.lookup([age or None for age in divages])):
+            divisionlow,divisionhigh = division or (None,None)
+            rows.append({'runnerid':runnerid,'year':year,'seriesid':seriesid,'divage':runnerdivage,
+                         'divisionlow':divisionlow,'divisionhigh':divisionhigh})
+    racedb.bulkinsert(session,racedb.RunnerSeason,rows)
+    
+    return len(rows)
+
+#----------------------------------------------------------------------
+def hasseason(session,year):
+#----------------------------------------------------------------------
+    '''
+    check whether racedb.RunnerSeason has been filled in for a season
+    
+    :param session: database session
+    :param year: year of season
+    :rtype: True if there are rows for the season
+    '''
+    return session.query(racedb.RunnerSeason.id).filter_by(year=year).first() is not None
+
+#----------------------------------------------------------------------
+def getseason(session,year,seriesid):
+#----------------------------------------------------------------------
+    '''
+    get members' divisions for a series for a season
+    
+    :param session: database session
+    :param year: year of season
+    :param seriesid: series.id
+    :rtype: {runnerid:(low,high) or None if not in a division, ...} for members in racedb.RunnerSeason
+    '''
+    season = {}
+    for runnerid,divisionlow,divisionhigh in session.query(racedb.RunnerSeason.runnerid,racedb.RunnerSeason.divisionlow,racedb.RunnerSeason.divisionhigh) \
+                                                    .filter_by(year=year,seriesid=seriesid).all():
+        season[runnerid] = (divisionlow,divisionhigh) if divisionlow is not None else None
+    return season
+
+#----------------------------------------------------------------------
+def getdivisionrunners(session,year,seriesid,division):
+#----------------------------------------------------------------------
+    '''
+    get the members who are in a division for a series for a season
+    
+    :param session: database session
+    :param year: year of season
+    :param seriesid: series.id
+    :param division: (low,high)
+    :rtype: list of runner.id
+    '''
+    divisionlow,divisionhigh = division
+    return [runnerid for runnerid, in session.query(racedb.RunnerSeason.runnerid)
+                                              .filter_by(year=year,seriesid=seriesid,divisionlow=divisionlow,divisionhigh=divisionhigh).all()]
+
+#----------------------------------------------------------------------
+def main():
+#----------------------------------------------------------------------
+    parser = argparse.ArgumentParser(version='{0} {1}'.format('runningclub',version.__version__))
+    parser.add_argument('rangespec',help='initial,delta,final, e.g., 18-24,10,80 means 18-24,25-34,35-44,...,75-79,80+')
+    parser.add_argument('ages',help='ages to look up',type=int,nargs='+')
+    args = parser.parse_args()
+
+    divmap = DivisionMap.fromspec(args.rangespec)
+    for age,divndx in zip(args.ages,divmap.indexes(args.ages)):
+        print('{0}: {1}'.format(age,divmap.labels[divndx] if divndx != NODIVISION else None))
+
+# ##########################################################################################
+#	__main__
+# ##########################################################################################
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/python
+###########################################################################################
+# filecache - save and load objects cached in files
+#
+#	Date		Author		Reason
+#	----		------		------
+#       10/19/26        Lou King        Create
+#
+#   Copyright 2026 Lou King
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+###########################################################################################
+'''
+filecache - save and load objects cached in files
+===================================================
+
+A cache file only saves time, so a cache file which is missing, damaged, or was written
+by an incompatible version of the software is treated as not cached, and failing to
+write a cache file is ignored.
+'''
+
+# standard
+import pdb
+import os
+import os.path
+import pickle
+
+# pypi
+
+# github
+
+# other
+
+# home grown
+
+#----------------------------------------------------------------------
+def loadcache(cachefile):
+#----------------------------------------------------------------------
+    '''
+    load an object which was saved by :func:`savecache`
+    
+    :param cachefile: name of cache file
+    :rtype: cached object, or None if not cached
+    '''
+    try:
+        with open(cachefile,'rb') as cache:
+            return pickle.load(cache)
+    # unpickling an incompatible object can raise most anything, e.g., AttributeError,
+    # ImportError, ValueError, so any failure is the same as not cached
+    except Exception:
+        return None
+
+#----------------------------------------------------------------------
+def savecache(cachefile,cached):
+#----------------------------------------------------------------------
+    '''
+    save an object to a cache file
+    
+    the cache is written to a temporary file and moved into place, as
+    another process may be saving the same file
+    
+    :param cachefile: name of cache file
+    :param cached: object to be pickled
+    '''
+    tempfile = '{0}.{1}.tmp'.format(cachefile,os.getpid())
+    try:
+        os.makedirs(os.path.dirname(cachefile),exist_ok=True)
+        with open(tempfile,'wb') as cache:
+            pickle.dump(cached,cache,pickle.HIGHEST_PROTOCOL)
+        os.replace(tempfile,cachefile)
+    except IOError:
+        if os.path.exists(tempfile):
+            os.remove(tempfile)
@@ -47,7 +47,7 @@ from . import clubmember
 from . import raceresults
 
 #----------------------------------------------------------------------
-def checkmembership(session,registrationfile,racedate,excluded,active,FOUNDCSV,MISSEDCSV,CLOSECSV): 
+def checkmembership(session,registrationfile,racedate,excluded,active,FOUNDCSV,MISSEDCSV,CLOSECSV,parsecache=False): 
 #----------------------------------------------------------------------
     '''
     find club members within registration file
@@ -60,35 +60,36 @@ def checkmembership(session,registrationfile,racedate,excluded,active,FOUNDCSV,M
     :param FOUNDCSV: filehandle to write found members
     :param MISSEDCSV: filehandle to write log of members which did not match age based on dob in database, if desired (else None)
     :param CLOSECSV: filehandle to write log of members which matched, but not exactly, if desired (else None)
+    :param parsecache: True to use the parse cache, see :class:`raceresults.RaceResults`, for a file which is likely to be checked again
     :rtype: number of entries processed
     '''
     
-    # collect registrations from registrationfile -- note distance argument doesn't matter
-    rr = raceresults.RaceResults(registrationfile,None,timereqd=False)
+    # registrations are read from registrationfile one at a time -- note distance argument doesn't matter
+    rr = raceresults.RaceResults(registrationfile,None,timereqd=False,cachedir=raceresults.CACHEDIR if parsecache else None)
     numentries = 0
-    results = []
-    while True:
-        try:
-            result = next(rr)
-            results.append(result)
-        except StopIteration:
-            break
-        numentries += 1
     
     # loop through registration entries
-    for rndx in range(len(results)):
-        result = results[rndx]
+    # confirmed matches from previous results imports are looked up once for each chunk of entries
+    for result,namematches in racedb.withnamematches(session,rr,excluded):
+        numentries += 1
         
         # skip result which has been asked to be excluded
         if result['name'] in excluded: continue
         
         # looking for members only
         # for these, don't indicate found unless member found
-        foundmember = active.findmember(result['name'],result['age'],racedate)
+        # confirmed matches from previous results imports don't need any fuzzy matching
+        activematch = None
+        memorunner = racedb.findnamematch(namematches,result['name'],result['gender'],result['age'],racedate)
+        if memorunner and memorunner.member and memorunner.active:
+            foundmember = (memorunner.name,memorunner.dateofbirth)
+        else:
+            activematch = active.matchmember(result['name'],result['age'],racedate)
+            foundmember = activematch.found
         
         # log member names found, but which did not match birth date
-        if MISSEDCSV and not foundmember:
-            missed = active.getmissedmatches()
+        if MISSEDCSV and activematch and not foundmember:
+            missed = activematch.getmissedmatches()
             for thismiss in missed:
                 name = thismiss['dbname']
                 ascdob = thismiss['dob']
@@ -119,6 +120,7 @@ def main():
     parser.add_argument('-e','--excludefile',help='file with list of racers to exclude, same format as "close-<registrationfile>.csv"',default=None)
     parser.add_argument('-c','--cutoff',help='cutoff for close match lookup (default %(default)0.2f)',type=float,default=0.7)
     parser.add_argument('-r','--racedb',help='filename of race database (default is as configured during rcuserconfig)',default=None)
+    parser.add_argument('--parsecache',help='keep the parsed registration file in the parse cache, so checking the same file again does not parse it again',action='store_true')
     args = parser.parse_args()
     
     registrationfile = args.registrationfile
@@ -161,7 +163,7 @@ def main():
     CLOSECSV.writeheader()
     
     # check membership for people within registration file
-    numentries = checkmembership(session,registrationfile,racedate,excluded,active,FOUNDCSV,MISSEDCSV,CLOSECSV)
+    numentries = checkmembership(session,registrationfile,racedate,excluded,active,FOUNDCSV,MISSEDCSV,CLOSECSV,args.parsecache)
     print('   {0} entries processed'.format(numentries))
     
     # close log entries 
@@ -35,6 +35,7 @@ import csv
 # home grown
 from . import version
 from .render import rendertime
+from .agegradetable import AgeGradeTable
 from loutilities.agegrade import AgeGrade
 
 # distances in miles
@@ -68,8 +69,9 @@ def genagtables(gen,agpcs,ages):
     :param ages: list of ages
     '''
     
-    # instantiate age grade object
+    # instantiate age grade object, and age grade tables for each distance
     ag = AgeGrade()
+    agtables = OrderedDict([(dist,AgeGradeTable(DISTTBL[dist],ag)) for dist in DISTTBL])
     
     # generate csv file for each age grade percentage
     for agpc in agpcs:
@@ -89,8 +91,7 @@ def genagtables(gen,agpcs,ages):
             
             # generate each result
             for dist in list(DISTTBL.keys()):
-                # if this fails, need to copy result from runningclub.agegrade to loutilities.agegrade
-                thistime = rendertime(ag.result(age,gen,DISTTBL[dist],agpc),0, useceiling=False, usefloor=True)
+                thistime = rendertime(agtables[dist].result(age,gen,agpc),0, useceiling=False, usefloor=True)
                 
                 # make sure format is h:m:s
                 while len(thistime.split(':')) < 3:
@@ -305,7 +305,7 @@ def getresultsmember(memberfile,resultsfile,racedate,dist,outfile):
     rr = RaceResults(resultsfile,dist)
     
     # get member pool from member file, abstract fill member information
-    pool = CsvClubMember(memberfile,cutoff=DIFF_CUTOFF)
+    pool = CsvClubMember(memberfile,cutoff=DIFF_CUTOFF,missedtolerance=AGE_DELTAMAX)
     members = Members(memberfile)
     
     # ready output file
@@ -330,7 +330,8 @@ def getresultsmember(memberfile,resultsfile,racedate,dist,outfile):
                 logger.debug('Processing {}'.format(mngresult.name))
                 
                 # create initial disposition
-                candidate = pool.findmember(mngresult.name,mngresult.age,racedate)
+                poolmatch = pool.matchmember(mngresult.name,mngresult.age,racedate)
+                candidate = poolmatch.found
                 logger.debug('  candidate = {}'.format(candidate))
     
                 # for members or people who were once members, set age based on date of birth in database
@@ -372,8 +373,8 @@ def getresultsmember(memberfile,resultsfile,racedate,dist,outfile):
                 if not candidate:
                     # favor active members, then inactive members
                     # note: nonmembers are not looked at for missed because filtermissed() depends on DOB
-                    missed = pool.getmissedmatches()
-                    logger.debug('  pool.getmissedmatches() = {}'.format(missed))
+                    missed = poolmatch.getmissedmatches()
+                    logger.debug('  poolmatch.getmissedmatches() = {}'.format(missed))
                     
                     # don't consider 'missed matches' where age difference from result is too large, or excluded
                     logger.debug('  missed before filter = {}'.format(missed))
@@ -56,6 +56,7 @@ import time
 from . import version
 from . import clubmember
 from . import racedb
+from . import divisions
 from .racedb import dbConsistencyError
 from loutilities import timeu
 
@@ -131,12 +132,14 @@ def main():
             # prep for if .. elif below by running some queries
             # handle close matches, if DOB does match
             age = timeu.age(asof,tYmd.asc2dt(thisdob))
-            matchingmember = dbmembers.findmember(thisname,age,asofasc)
+            # the match carries the runner's id, so the runner can be retrieved directly
+            # active members were all loaded above, so for these this doesn't need to query the database
+            matchingmember = dbmembers.matchmember(thisname,age,asofasc).record
             dbmember = None
             if matchingmember:
-                membername,memberdob = matchingmember
-                if memberdob == thisdob:
-                    dbmember = racedb.getunique(session,racedb.Runner,member=True,name=membername,dateofbirth=thisdob)
+                membername,memberdob = matchingmember.name,matchingmember.dob
+                if memberdob == thisdob and matchingmember.member:
+                    dbmember = session.query(racedb.Runner).get(matchingmember.runnerid)
             
             # TODO: need to handle case where dob transitions from '' to actual date of birth
             
@@ -166,6 +169,10 @@ def main():
                 added = racedb.update(session,racedb.Runner,dbmember,thisrunner,skipcolumns=['id'])
                 found = True
                 
+                # keep member pool current for the rest of the file
+                if added:
+                    dbmembers.update_member(membername,thisdob,thisname,thisdob,thisgender,thishometown,member=True,active=True)
+                
             # if runner's name is in database, but not a member, see if this runner is a nonmemember which can be converted
             # Check first result for age against age within the input file
             # if ages match, convert nonmember to member
@@ -188,6 +195,8 @@ def main():
                     thisrunner = racedb.Runner(thisname,thisdob,thisgender,thishometown)
                     added = racedb.update(session,racedb.Runner,dbnonmember,thisrunner,skipcolumns=['id'])
                     found = True
+                    if added:
+                        dbmembers.update_member(thisname,'',thisname,thisdob,thisgender,thishometown,dbnonmember.id,member=True,active=True)
                 else:
                     print('{} found in database, wrong age, expected {} found {} in {}'.format(thisname,expectedage,resultage,result))
                     # TODO: need to make file for these, also need way to force update, because maybe bad date in database for result
@@ -197,6 +206,10 @@ def main():
             if not found:
                 thisrunner = racedb.Runner(thisname,thisdob,thisgender,thishometown)
                 added = racedb.insert_or_update(session,racedb.Runner,thisrunner,skipcolumns=['id'],name=thisname,dateofbirth=thisdob)
+                if added:
+                    # thisrunner isn't the persisted row if an existing runner was updated, so get the id from the database
+                    runnerid = racedb.getunique(session,racedb.Runner,name=thisname,dateofbirth=thisdob).id
+                    dbmembers.update_member(thisname,thisdob,thisname,thisdob,thisgender,thishometown,runnerid,member=True,active=True)
                 
             # remove this runner from collection of runners which should be deactivated in database
             if (thisrunner.name,thisrunner.dateofbirth) in inactiverunners:
@@ -215,6 +228,9 @@ def main():
         
         if OUT:
             OUT.write('deactivated {0}\n'.format(thisrunner))
+    
+    # members' divisions are filled in again for this season, as dates of birth may have changed
+    divisions.updateseason(session,thisyear)
         
     session.commit()
     session.close()
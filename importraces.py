@@ -65,6 +65,7 @@ from .config import dbConsistencyError
 from . import version
 from . import racefile
 from . import racedb
+from . import divisions
 
 # debug output, maybe
 OUT = None
@@ -287,6 +288,10 @@ def main():
     updateseries(session,fileraces)
     updateraceseries(session,fileraces)
     updatedivisions(session,fileraces)
+    
+    # divisions may have changed, so members' divisions are filled in again for these seasons
+    for year in set([int(race['year']) for race in fileraces.getraces()]):
+        divisions.updateseason(session,year)
 
     session.commit()
     session.close()
@@ -34,9 +34,15 @@ import argparse
 import collections
 import os.path
 import csv
+import sys
+import time
+import math
+import pickle
 
 # pypi
 import xlrd
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy import Float
 
 # github
 
@@ -50,6 +56,9 @@ from . import clubmember
 from . import raceresults
 from loutilities import agegrade
 from . import render
+from . import ranking
+from . import divisions
+from . import agegradetable
 from loutilities import timeu
 
 # module globals
@@ -58,96 +67,287 @@ DEBUG = None
 AGDEBUG = None
 ag = agegrade.AgeGrade()
 
+# results are written, and the session is flushed and expunged, every CHUNKSIZE rows by default
+CHUNKSIZE = 1000
+
+# fields which are used to match an entry, so an entry with the same values doesn't need to be matched again, see matchkey()
+MATCHKEYFIELDS = ['name','age','gender','time']
+
+# log file columns
+MATCHLOGFIELDS = ['results name','results age','database name','database dob','ratio']
+NONMEMLOGFIELDS = ['results name','results age','new','runner id']
+
+########################################################################
+class Finisher():
+########################################################################
+    '''
+    finisher from a results file, after matching and age grading
+    
+    this holds everything about a result which doesn't depend on the series
+    
+    :param resultname: name as found in results file
+    :param resultage: age as found in results file
+    :param runnerid: id of racedb.Runner
+    :param gender: M or F
+    :param time: time (seconds)
+    :param agegradeage: age on race date, or None if not known
+    :param divage: age on Jan 1 of race year, or None if not known
+    :param member: True if matched to an active member
+    :param inactive: (name,dob) of inactive member, if matched to an inactive member, else None
+    '''
+    __slots__ = ('resultname','resultage','runnerid','gender','time','agegradeage','divage','member','inactive','agpercent','agtime','agfactor')
+    
+    #----------------------------------------------------------------------
+    def __init__(self,resultname,resultage,runnerid,gender,time,agegradeage,divage,member,inactive):
+    #----------------------------------------------------------------------
+        self.resultname = resultname
+        self.resultage = resultage
+        self.runnerid = runnerid
+        self.gender = gender
+        self.time = time
+        self.agegradeage = agegradeage
+        self.divage = divage
+        self.member = member
+        self.inactive = inactive
+        
+        # set by collectresults() if age is known
+        self.agpercent = None
+        self.agtime = None
+        self.agfactor = None
+
+########################################################################
+class MatchedRace():
+########################################################################
+    '''
+    finishers from a results file after matching and age grading, with the database updates
+    which the matching requires.  These updates are made by :func:`recordmatches`
+    
+    :param finishers: list of :class:`Finisher`
+    :param numentries: number of entries processed
+    :param newnonmembers: {name:gender, ...} for nonmembers to be added
+    :param newfinishers: list of (finisher,name) for finishers who are new nonmembers, so need runnerid
+    :param nonmemlog: list of (nonmember log row,name), runner id is None in log rows for new nonmembers
+    :param namematches: list of (results name,results gender,results age,runnerid) for confirmed matches
+    :param entries: list of (:func:`matchkey`, :class:`Finisher` or None if not a finisher) for entries which weren't excluded, see :func:`savematched`
+    :param numreused: number of entries which were unchanged from the previous import, so weren't matched again
+    '''
+    __slots__ = ('finishers','numentries','newnonmembers','newfinishers','nonmemlog','namematches','entries','numreused')
+    
+    #----------------------------------------------------------------------
+    def __init__(self,finishers,numentries,newnonmembers,newfinishers,nonmemlog,namematches,entries=[],numreused=0):
+    #----------------------------------------------------------------------
+        self.finishers = finishers
+        self.numentries = numentries
+        self.newnonmembers = newnonmembers
+        self.newfinishers = newfinishers
+        self.nonmemlog = nonmemlog
+        self.namematches = namematches
+        self.entries = entries
+        self.numreused = numreused
+
+########################################################################
+class Progress():
+########################################################################
+    '''
+    progress line for a long running step, showing rows per second and estimated time remaining
+
+    the line is rewritten in place each time it is updated
+    
+    :param label: label for the step
+    :param units: what is being counted, e.g., 'entries'
+    :param OUT: file to write progress line to
+    '''
+    #----------------------------------------------------------------------
+    def __init__(self,label,units='rows',OUT=sys.stdout):
+    #----------------------------------------------------------------------
+        self.label = label
+        self.units = units
+        self.OUT = OUT
+        self.start()
+
+    #----------------------------------------------------------------------
+    def start(self,total=None):
+    #----------------------------------------------------------------------
+        '''
+        start timing the step
+        
+        :param total: total number of rows expected, or None if not known
+        '''
+        self.total = total
+        self.starttime = time.time()
+        self.linelen = 0
+
+    #----------------------------------------------------------------------
+    def update(self,numdone):
+    #----------------------------------------------------------------------
+        '''
+        show progress
+        
+        :param numdone: number of rows done so far
+        '''
+        elapsed = time.time() - self.starttime
+        rate = numdone / elapsed if elapsed > 0 else 0.0
+        
+        line = '   {0}: {1}'.format(self.label,numdone)
+        if self.total is not None:
+            line += '/{0}'.format(self.total)
+        line += ' {0}, {1:.0f} {0}/s'.format(self.units,rate)
+        if self.total is not None and rate > 0:
+            eta = int(round((self.total - numdone) / rate))
+            line += ', ETA {0}:{1:02d}'.format(eta // 60,eta % 60)
+        
+        # pad to overwrite anything left from the previous line
+        self.OUT.write('\r{0}'.format(line.ljust(self.linelen)))
+        self.OUT.flush()
+        self.linelen = len(line)
+
+    #----------------------------------------------------------------------
+    def done(self):
+    #----------------------------------------------------------------------
+        '''
+        end the progress line
+        '''
+        if self.linelen:
+            self.OUT.write('\n')
+            self.OUT.flush()
+        self.linelen = 0
+
+#----------------------------------------------------------------------
+def collectresults(session,race,resultsfile,excluded,nonmemforced,membersonly,active,inactive,nonmember,MISSEDCSV,CLOSECSV,NONMEMCSV,confirmclose=None,chunksize=CHUNKSIZE,progress=None,parsecache=False): 
 #----------------------------------------------------------------------
-def tabulate(session,race,resultsfile,excluded,nonmemforced,series,active,inactive,nonmember,INACTCSV,MISSEDCSV,CLOSECSV,NONMEMCSV): 
+    '''
+    collect the finishers from the results file, with the information which is the same for all series
+    
+    see :func:`matchresults` for parameters
+    
+    :param NONMEMCSV: filehandle to write log of nonmembers which were found, if desired (else None)
+    :rtype: list of :class:`Finisher`, number of entries processed
+    '''
+    matched = matchresults(session,race,resultsfile,excluded,nonmemforced,membersonly,active,inactive,nonmember,MISSEDCSV,CLOSECSV,confirmclose,chunksize,progress,parsecache)
+    return recordmatches(session,race,matched,NONMEMCSV,chunksize)
+
+#----------------------------------------------------------------------
+def matchresults(session,race,resultsfile,excluded,nonmemforced,membersonly,active,inactive,nonmember,MISSEDCSV,CLOSECSV,confirmclose=None,chunksize=CHUNKSIZE,progress=None,parsecache=False,previous=None): 
 #----------------------------------------------------------------------
     '''
-    collect the data, as directed by series attributes
+    match and age grade the finishers from the results file
+    
+    the database is not updated, so this can be run for several races at the same time
     
     :param session: database session
     :param race: racedb.Race object
     :param resultsfile: file containing results
     :param excluded: list of racers which are to be excluded from results, regardless of member match
     :param nonmemforced: list of racers which forced to be included as nonmembers, regardless of member match
-    :param series: racedb.Series object - describes how to calculate results
+    :param membersonly: True if all series for this race are for members only, so nonmembers are not needed
     :param active: active members as produced by clubmember.ClubMember()
     :param inactive: inactive members as produced by clubmember.ClubMember()
     :param nonmember: nonmembers as produced by clubmember.ClubMember()
-    :param INACTCSV: filehandle to write inactive member log entries, if desired (else None)
     :param MISSEDCSV: filehandle to write log of members which did not match age based on dob in database, if desired (else None)
     :param CLOSECSV: filehandle to write log of members which matched, but not exactly, if desired (else None)
-    :param NONMEMCSV: filehandle to write log of nonmembers which were found, if desired (else None)
-    :rtype: number of entries processed
+    :param confirmclose: {results name:database name, ...} for close matches which have been reviewed, so they can be remembered as confirmed matches, see :func:`getconfirmed`
+    :param chunksize: number of entries for which confirmed matches are looked up at once, and between progress updates
+    :param progress: :class:`Progress` to show entries matched, if desired (else None)
+    :param parsecache: True to use the parse cache, see :class:`raceresults.RaceResults`, for a file which is likely to be imported again
+    :param previous: entries from the previous import of this file, from :func:`loadmatched`, if desired (else None).  Entries which
+        are unchanged aren't matched or age graded again, and aren't logged again
+    :rtype: :class:`MatchedRace`
     '''
     
     # get precision for time rendering
     timeprecision,agtimeprecision = render.getprecision(race.distance)
     
-    # get divisions for this series, if appropriate
-    if series.divisions:
-        alldivs = session.query(racedb.Divisions).filter_by(seriesid=series.id,active=True).all()
-        
-        if len(alldivs) == 0:
-            raise dbConsistencyError('series {0} indicates divisions to be calculated, but no divisions found'.format(series.name))
-        
-        divisions = []
-        for div in alldivs:
-            divisions.append((div.divisionlow,div.divisionhigh))
-
-        # TODO: remove dead code
-        #division = {'F':collections.OrderedDict(),'M':collections.OrderedDict()}
-        ## force order of dict.  later delete empty divisions
-        #for gender in ['F','M']:
-        #    for thisdiv in divisions:
-        #        division[gender][thisdiv] = []
-
-    # collect results from resultsfile
-    rr = raceresults.RaceResults(resultsfile,race.distance)
+    # close matches are only confirmed if they have been reviewed
+    if confirmclose is None:
+        confirmclose = {}
+    
+    # division age is based on age as of Jan 1 for race year
+    racedate = tYmd.asc2dt(race.date)
+    divdate = racedate.replace(month=1,day=1)
+    
+    # results are read from resultsfile one at a time, as they're processed
+    # the parse cache is only worth its space when the same file is imported again
+    rr = raceresults.RaceResults(resultsfile,race.distance,cachedir=raceresults.CACHEDIR if parsecache else None)
     numentries = 0
-    results = []
-    while True:
-        try:
-            result = next(rr)
-            results.append(result)
-        except StopIteration:
-            break
-        numentries += 1
+    finishers = []
     
-    # loop through result entries, collecting overall, bygender, division and agegrade results
-    for rndx in range(len(results)):
-        result = results[rndx]
+    # new nonmembers are added to the database after the whole file is read, see addnonmembers()
+    # until then, the finishers and the nonmember log entries for them are kept aside
+    newnonmembers = collections.OrderedDict()
+    newfinishers = []
+    nonmemlog = []
+    namematches = []
+    entries = []
+    numreused = 0
+    
+    # finishers to be age graded, with adjusted time
+    aggraded = []
+    
+    # loop through result entries, collecting member and age grade information
+    if progress: progress.start()
+    # confirmed matches from previous imports are looked up once for each chunk of entries
+    for result,confirmed in racedb.withnamematches(session,rr,nonmemforced,chunksize):
+        if progress and numentries and numentries % chunksize == 0:
+            progress.update(numentries)
+        
+        numentries += 1
         
         # skip result which has been asked to be excluded
         if result['name'] in excluded: continue
         
-        # some races are for members only
-        # for these, don't tabulate unless member found
+        # entry which is unchanged from the previous import doesn't need to be matched again
+        entrykey = matchkey(result)
+        if previous and previous.get(entrykey):
+            finisher = previous[entrykey].pop(0)
+            entries.append((entrykey,finisher))
+            if finisher:
+                finishers.append(finisher)
+            numreused += 1
+            continue
+        
         # don't look for member if we are forcing this name to be a nonmember
         foundmember = None
         foundinactive = None
+        foundnonmember = None
+        activematch = None
+        memorunner = None
+        memberrecord = None
         if result['name'] not in nonmemforced:
-            foundmember = active.findmember(result['name'],result['age'],race.date)
-            foundinactive = inactive.findmember(result['name'],result['age'],race.date)
-        foundnonmember = nonmember.findname(result['name'])
+            # confirmed matches from previous imports don't need any fuzzy matching
+            memorunner = racedb.findnamematch(confirmed,result['name'],result['gender'],result['age'],race.date)
+            if memorunner and memorunner.member:
+                if memorunner.active:
+                    foundmember = (memorunner.name,memorunner.dateofbirth)
+                else:
+                    foundinactive = (memorunner.name,memorunner.dateofbirth)
+            else:
+                memorunner = None
+                activematch = active.matchmember(result['name'],result['age'],race.date)
+                inactivematch = inactive.matchmember(result['name'],result['age'],race.date)
+                foundmember = activematch.found
+                foundinactive = inactivematch.found
+                memberrecord = activematch.record or inactivematch.record
+        if not memorunner:
+            nonmemberrecord = nonmember.findrecord(result['name'])
+            foundnonmember = nonmemberrecord.name if nonmemberrecord else None
         
         # log member names found, but which did not match birth date
-        if MISSEDCSV and result['name'] not in nonmemforced and not foundmember:
-            missed = active.getmissedmatches()
+        if MISSEDCSV and activematch and not foundmember:
+            missed = activematch.getmissedmatches()
             for thismiss in missed:
                 name = thismiss['dbname']
                 ascdob = thismiss['dob']
                 ratio = thismiss['ratio']
                 MISSEDCSV.writerow({'results name':result['name'],'results age':result['age'],'database name':name,'database dob':ascdob,'ratio':ratio})
-            
-        # log inactive members (members who had previously paid, but are not paid up) who ran this race
-        if series.membersonly and not foundmember:
-            if foundinactive and INACTCSV:
-                name,ascdob = foundinactive
-                ratio = clubmember.getratio(result['name'].strip().lower(),name.strip().lower())
-                INACTCSV.writerow({'results name':result['name'],'results age':result['age'],'database name':name,'database dob':ascdob,'ratio':ratio})
-            continue
         
+        # some races are for members only
+        # for these, don't tabulate unless member found (inactive members are logged for each series)
+        if membersonly and not foundmember and not foundinactive:
+            entries.append((entrykey,None))
+            continue
+            
         # for members or people who were once members, set age based on date of birth in database
+        divage = None
         if foundmember or foundinactive:
             # for members and inactivemembers, get name, id and genderfrom database (will replace that which was used in results file)
             if foundmember:
@@ -158,10 +358,18 @@ def tabulate(session,race,resultsfile,excluded,nonmemforced,series,active,inacti
             elif foundinactive:
                 name,ascdob = foundinactive
         
-            # get runner from database
-            runner = session.query(racedb.Runner).filter_by(name=name,dateofbirth=ascdob).first()
-            runnerid = runner.id
-            gender = runner.gender
+            # runner id and gender come with the match
+            if memorunner:
+                runnerid = memorunner.id
+                gender = memorunner.gender
+            else:
+                runnerid = memberrecord.runnerid
+                gender = memberrecord.gender
+            
+            # remember confirmed matches so later imports can skip fuzzy matching
+            # close matches are only confirmed if this match is listed in the reviewed close log
+            if not memorunner and (confirmclose.get(result['name']) == name or name.strip().lower() == result['name'].strip().lower()):
+                namematches.append((result['name'],result['gender'],result['age'],runnerid))
             
             try:
                 dob = tYmd.asc2dt(ascdob)
@@ -171,12 +379,8 @@ def tabulate(session,race,resultsfile,excluded,nonmemforced,series,active,inacti
             # set division age (based on age as of Jan 1 for race year)
             # NOTE: the code below assumes that races by divisions are only for members
             # this is because we need to know the runner's age as of Jan 1 for division standings
-            racedate = tYmd.asc2dt(race.date)
-            divdate = racedate.replace(month=1,day=1)
             if dob:
                 divage = divdate.year - dob.year - int((divdate.month, divdate.day) < (dob.month, dob.day))
-            else:
-                divage = None
         
             # for members, set agegrade age (race date based)
             if dob:
@@ -193,11 +397,15 @@ def tabulate(session,race,resultsfile,excluded,nonmemforced,series,active,inacti
             # TODO: how to handle corner case when there are two matching nonmembers of different ages?
             name = foundnonmember
             
-            # get runner from database
-            runner = session.query(racedb.Runner).filter_by(name=name,member=False).first()
-            runnerid = runner.id
-            gender = runner.gender
-            NONMEMCSV.writerow({'results name':result['name'],'results age':result['age'],'new':'N','runner id':runnerid})
+            # runner id and gender come with the match, unless it is a new nonmember found earlier in this file
+            if name not in newnonmembers and nonmemberrecord.runnerid is not None:
+                runnerid = nonmemberrecord.runnerid
+                gender = nonmemberrecord.gender
+            # nonmember may also have been found by another race which hasn't been recorded yet, see importseason
+            else:
+                runnerid = None
+                gender = newnonmembers.setdefault(name,result['gender'].upper())
+            nonmemlog.append(({'results name':result['name'],'results age':result['age'],'new':'N','runner id':runnerid},name))
             
             try:
                 agegradeage = int(result['age'])
@@ -210,18 +418,19 @@ def tabulate(session,race,resultsfile,excluded,nonmemforced,series,active,inacti
         else:
             name = result['name']
             gender = result['gender'].upper()
-            divage = None
             
             try:
                 agegradeage = int(result['age'])
             except:
                 agegradeage = None
                 
-            # create the nonmember in the database (no date of birth or hometown)
-            runner = racedb.Runner(name,None,gender,None,member=False)
-            added = racedb.insert_or_update(session,racedb.Runner,runner,skipcolumns=['id'],name=runner.name,dateofbirth=None,member=False)
-            runnerid = runner.id
-            NONMEMCSV.writerow({'results name':result['name'],'results age':result['age'],'new':'Y','runner id':runnerid})
+            # the nonmember is created in the database after the whole file is read (no date of birth or hometown)
+            # keep nonmember pool current, in case this runner shows up again in this file
+            if name not in newnonmembers:
+                newnonmembers[name] = gender
+                nonmember.add_member(name,'',gender,'')
+            runnerid = None
+            nonmemlog.append(({'results name':result['name'],'results age':result['age'],'new':'Y','runner id':runnerid},name))
             
         # may need to write to debug file
         if DEBUG: 
@@ -234,167 +443,393 @@ def tabulate(session,race,resultsfile,excluded,nonmemforced,series,active,inacti
             else:
                 DEBUG.write('{0},{1},{2},{3},{4}\n'.format(result['name'],result['age'],'',name,'new nonmember'))
 
-        # at this point, there should always be a runnerid in the database, even if non-member
+        # at this point, there should always be a runnerid in the database, unless a new non-member
         resulttime = result['time']
-        raceresult = racedb.RaceResult(runnerid,race.id,series.id,resulttime,gender,agegradeage)
+        finisher = Finisher(result['name'],result['age'],runnerid,gender,resulttime,agegradeage,divage,bool(foundmember),None if foundmember else foundinactive)
+        if runnerid is None:
+            newfinishers.append((finisher,name))
 
         # always add age grade to result if we know the age
         # we will decide whether to render, later based on series.calcagegrade, in another script
+        # age grade debug output is per result, so need to age grade each result separately
         if agegradeage:
-            timeprecision,agtimeprecision = render.getprecision(race.distance)
             adjtime = render.adjusttime(resulttime,timeprecision)    # ceiling for adjtime
             if AGDEBUG:
                 AGDEBUG.write('{},{},{},'.format(result['name'],resulttime,adjtime))
-            raceresult.agpercent,raceresult.agtime,raceresult.agfactor = ag.agegrade(agegradeage,gender,race.distance,adjtime)
+                finisher.agpercent,finisher.agtime,finisher.agfactor = ag.agegrade(agegradeage,gender,race.distance,adjtime)
+            else:
+                aggraded.append((finisher,adjtime))
+        
+        finishers.append(finisher)
+        entries.append((entrykey,finisher))
+    
+    if progress: progress.update(numentries)
+    
+    # age grade all the results at once
+    if aggraded:
+        agtable = agegradetable.AgeGradeTable(race.distance,ag)
+        agstats = agtable.grade([finisher.agegradeage for finisher,adjtime in aggraded],
+                                [finisher.gender for finisher,adjtime in aggraded],
+                                [adjtime for finisher,adjtime in aggraded])
+        for (finisher,adjtime),agpercent,agtime,agfactor in zip(aggraded,*agstats):
+            finisher.agpercent,finisher.agtime,finisher.agfactor = agpercent,agtime,agfactor
+    
+    return MatchedRace(finishers,numentries,newnonmembers,newfinishers,nonmemlog,namematches,entries,numreused)
 
-        if series.divisions:
-            # member's age to determine division is the member's age on Jan 1
-            # if member doesn't give date of birth for membership list, member is not eligible for division awards
-            # if non-member, also no division awards, because age as of Jan 1 is not known
-            age = divage    # None if not available
-            if age:
-                # linear search for correct division
-                for thisdiv in divisions:
-                    divlow = thisdiv[0]
-                    divhigh = thisdiv[1]
-                    if age in range(divlow,divhigh+1):
-                        raceresult.divisionlow = divlow
-                        raceresult.divisionhigh = divhigh
-                        break
-
-        # make result persistent
-        session.add(raceresult)
-        
-    # process overall and bygender results, sorted by time
+#----------------------------------------------------------------------
+def recordmatches(session,race,matched,NONMEMCSV,chunksize=CHUNKSIZE): 
+#----------------------------------------------------------------------
+    '''
+    make the database updates required by the matching in :func:`matchresults`
+    
+    :param session: database session
+    :param race: racedb.Race object
+    :param matched: :class:`MatchedRace` from :func:`matchresults`
+    :param NONMEMCSV: filehandle to write log of nonmembers which were found, if desired (else None)
+    :param chunksize: number of confirmed matches between flushing the session
+    :rtype: list of :class:`Finisher`, number of entries processed
+    '''
+    # remember confirmed matches so later imports can skip fuzzy matching
+    for matchndx,(resultname,resultgender,resultage,runnerid) in enumerate(matched.namematches):
+        if matchndx and matchndx % chunksize == 0:
+            racedb.flushexpunge(session,racedb.NameMatch)
+        racedb.setnamematch(session,resultname,resultgender,resultage,race.date,runnerid)
+    
+    # create new nonmembers in one batch, then fill in their runner ids
+    newrunnerids = addnonmembers(session,matched.newnonmembers)
+    for finisher,name in matched.newfinishers:
+        finisher.runnerid = newrunnerids[name]
+    
+    # nonmember log needs the runner ids
+    if NONMEMCSV:
+        for row,name in matched.nonmemlog:
+            if row['runner id'] is None:
+                row['runner id'] = newrunnerids[name]
+            NONMEMCSV.writerow(row)
+        
+    return matched.finishers,matched.numentries
+
+#----------------------------------------------------------------------
+def addnonmembers(session,newnonmembers): 
+#----------------------------------------------------------------------
+    '''
+    add new nonmembers to the database in one batch
+    
+    :param session: database session
+    :param newnonmembers: {name:gender, ...} for nonmembers to be added
+    :rtype: {name:runnerid, ...}
+    '''
+    names = list(newnonmembers.keys())
+    
+    # don't try to add any which are already there
+    runnerids = racedb.getnonmemberids(session,names)
+    racedb.bulkinsert(session,racedb.Runner,[{'name':name,'dateofbirth':'','gender':newnonmembers[name],'hometown':None,'member':False,'active':True}
+                                             for name in names if name not in runnerids])
+    
+    # collect ids for those just added
+    runnerids.update(racedb.getnonmemberids(session,[name for name in names if name not in runnerids]))
+    return runnerids
+
+#----------------------------------------------------------------------
+def tabulate(session,race,series,finishers,INACTCSV,incremental=False,chunksize=CHUNKSIZE,progress=None): 
+#----------------------------------------------------------------------
+    '''
+    record the results for a series, as directed by series attributes
+    
+    :param session: database session
+    :param race: racedb.Race object
+    :param series: racedb.Series object - describes how to calculate results
+    :param finishers: list of :class:`Finisher` from :func:`collectresults`
+    :param INACTCSV: filehandle to write inactive member log entries, if desired (else None)
+    :param incremental: if True, update previously recorded results rather than adding all results, see :func:`diffresults`
+    :param chunksize: number of results written between flushing the session, and between progress updates
+    :param progress: :class:`Progress` to show results written, if desired (else None)
+    :rtype: number of results recorded, (number added, number updated, number deleted) if incremental else None
+    '''
+    
+    # get precision for time rendering
+    timeprecision,agtimeprecision = render.getprecision(race.distance)
+    
+    # get divisions for this series, if appropriate
+    if series.divisions:
+        divmap = divisions.DivisionMap.fromdb(session,series.id)
+        
+        if len(divmap) == 0:
+            raise dbConsistencyError('series {0} indicates divisions to be calculated, but no divisions found'.format(series.name))
+        
+        # member's age to determine division is the member's age on Jan 1
+        # if member doesn't give date of birth for membership list, member is not eligible for division awards
+        # if non-member, also no division awards, because age as of Jan 1 is not known
+        # members' divisions for the season come from racedb.RunnerSeason, see divisions.updateseason()
+        # divisions for anyone not there yet, or whose division is no longer configured for the series, are looked up from the age
+        season = divisions.getseason(session,race.year,series.id)
+        finisherdivs = [season[finisher.runnerid] if season.get(finisher.runnerid) in divmap.divisions else divmap.division(finisher.divage or None)
+                        for finisher in finishers]
+    else:
+        finisherdivs = [None] * len(finishers)
+
+    seriesresults = []
+    for finisher,finisherdiv in zip(finishers,finisherdivs):
+        # log inactive members (members who had previously paid, but are not paid up) who ran this race
+        if series.membersonly and not finisher.member:
+            if finisher.inactive and INACTCSV:
+                name,ascdob = finisher.inactive
+                ratio = clubmember.getratio(finisher.resultname.strip().lower(),name.strip().lower())
+                INACTCSV.writerow({'results name':finisher.resultname,'results age':finisher.resultage,'database name':name,'database dob':ascdob,'ratio':ratio})
+            continue
+        
+        # results are written in one batch, so they're kept as racedb.RaceResult column mappings
+        raceresult = {'runnerid':finisher.runnerid,'raceid':race.id,'seriesid':series.id,'runnername':None,'time':finisher.time,
+                      'gender':finisher.gender,'agage':finisher.agegradeage,'divisionlow':None,'divisionhigh':None,
+                      'agpercent':finisher.agpercent,'agtime':finisher.agtime,'agfactor':finisher.agfactor,
+                      'overallplace':None,'genderplace':None,'divisionplace':None,'agtimeplace':None}
+
+        if finisherdiv:
+            raceresult['divisionlow'],raceresult['divisionhigh'] = finisherdiv
+
+        seriesresults.append(raceresult)
+        
+    # places are assigned in memory before the results are written
+    # ties are detected based on rendering, which rounds to a specific precision based on distance
     # TODO: is series.overall vs. series.orderby=='time' redundant?  same questio for series.agegrade vs. series.orderby=='agtime'
+    ### TODO: use series.orderby, series.hightolow
+    genders = [rr['gender'] if rr['gender'] in ['F','M'] else None for rr in seriesresults]
     if series.orderby == 'time':
-        # get all the results which have been stored in the database for this race/series
-        ### TODO: use series.orderby, series.hightolow
-        dbresults = session.query(racedb.RaceResult).filter_by(raceid=race.id,seriesid=series.id).order_by(racedb.RaceResult.time).all()
-        numresults = len(dbresults)
-        for rrndx in range(numresults):
-            raceresult = dbresults[rrndx]
-            
-            # set place if it has not been set before
-            # place may have been determined at previous iteration, if a tie was detected
-            if not raceresult.overallplace:
-                thisplace = rrndx+1
-                tieindeces = [rrndx]
-                
-                # detect tie in subsequent results based on rendering,
-                # which rounds to a specific precision based on distance
-                time = render.rendertime(raceresult.time,timeprecision)
-                for tiendx in range(rrndx+1,numresults):
-                    if render.rendertime(dbresults[tiendx].time,timeprecision) != time:
-                        break
-                    tieindeces.append(tiendx)
-                lasttie = tieindeces[-1] + 1
-                for tiendx in tieindeces:
-                    numsametime = len(tieindeces)
-                    if numsametime > 1 and series.averagetie:
-                        dbresults[tiendx].overallplace = (thisplace+lasttie) / 2.0
-                    else:
-                        dbresults[tiendx].overallplace = thisplace
-
-        for gender in ['F','M']:
-            dbresults = session.query(racedb.RaceResult).filter_by(raceid=race.id,seriesid=series.id,gender=gender).order_by(racedb.RaceResult.time).all()
-
-            numresults = len(dbresults)
-            for rrndx in range(numresults):
-                raceresult = dbresults[rrndx]
-            
-                # set place if it has not been set before
-                # place may have been determined at previous iteration, if a tie was detected
-                if not raceresult.genderplace:
-                    thisplace = rrndx+1
-                    tieindeces = [rrndx]
-                    
-                    # detect tie in subsequent results based on rendering,
-                    # which rounds to a specific precision based on distance
-                    time = render.rendertime(raceresult.time,timeprecision)
-                    for tiendx in range(rrndx+1,numresults):
-                        if render.rendertime(dbresults[tiendx].time,timeprecision) != time:
-                            break
-                        tieindeces.append(tiendx)
-                    lasttie = tieindeces[-1] + 1
-                    for tiendx in tieindeces:
-                        numsametime = len(tieindeces)
-                        if numsametime > 1 and series.averagetie:
-                            dbresults[tiendx].genderplace = (thisplace+lasttie) / 2.0
-                        else:
-                            dbresults[tiendx].genderplace = thisplace
-
+        # process overall, bygender and division results, sorted by time
+        byplace = ranking.Ranking([rr['time'] for rr in seriesresults],tiekey=lambda t: render.rendertime(t,timeprecision))
+        overallplaces = byplace.places(averagetie=series.averagetie)
+        genderplaces = byplace.places(genders,averagetie=series.averagetie)
         if series.divisions:
-            for gender in ['F','M']:
-                
-                # linear search for correct division
-                for thisdiv in divisions:
-                    divlow = thisdiv[0]
-                    divhigh = thisdiv[1]
-
-                    dbresults = session.query(racedb.RaceResult)  \
-                                  .filter_by(raceid=race.id,seriesid=series.id,gender=gender,divisionlow=divlow,divisionhigh=divhigh) \
-                                  .order_by(racedb.RaceResult.time).all()
-        
-                    numresults = len(dbresults)
-                    for rrndx in range(numresults):
-                        raceresult = dbresults[rrndx]
-
-                        # set place if it has not been set before
-                        # place may have been determined at previous iteration, if a tie was detected
-                        if not raceresult.divisionplace:
-                            thisplace = rrndx+1
-                            tieindeces = [rrndx]
-                            
-                            # detect tie in subsequent results based on rendering,
-                            # which rounds to a specific precision based on distance
-                            time = render.rendertime(raceresult.time,timeprecision)
-                            for tiendx in range(rrndx+1,numresults):
-                                if render.rendertime(dbresults[tiendx].time,timeprecision) != time:
-                                    break
-                                tieindeces.append(tiendx)
-                            lasttie = tieindeces[-1] + 1
-                            for tiendx in tieindeces:
-                                numsametime = len(tieindeces)
-                                if numsametime > 1 and series.averagetie:
-                                    dbresults[tiendx].divisionplace = (thisplace+lasttie) / 2.0
-                                else:
-                                    dbresults[tiendx].divisionplace = thisplace
-
+            divkeys = [(rr['gender'],rr['divisionlow'],rr['divisionhigh']) if rr['gender'] in ['F','M'] and rr['divisionlow'] is not None else None for rr in seriesresults]
+            divisionplaces = byplace.places(divkeys,averagetie=series.averagetie)
+        else:
+            divisionplaces = [None] * len(seriesresults)
+        for rr,overallplace,genderplace,divisionplace in zip(seriesresults,overallplaces,genderplaces,divisionplaces):
+            rr['overallplace'] = overallplace
+            rr['genderplace'] = genderplace
+            rr['divisionplace'] = divisionplace
+    
     # process age grade results, ordered by agtime
     elif series.orderby == 'agtime':
-        for gender in ['F','M']:
-            dbresults = session.query(racedb.RaceResult).filter_by(raceid=race.id,seriesid=series.id,gender=gender).order_by(racedb.RaceResult.agtime).all()
+        byplace = ranking.Ranking([rr['agtime'] for rr in seriesresults],tiekey=lambda t: render.rendertime(t,agtimeprecision))
+        agtimeplaces = byplace.places(genders,averagetie=series.averagetie)
+        for rr,agtimeplace in zip(seriesresults,agtimeplaces):
+            rr['agtimeplace'] = agtimeplace
+    
+    # make results persistent
+    if incremental:
+        added,updated,deleted = diffresults(session,race,series,seriesresults)
+        writes = [(racedb.bulkdelete,deleted),(racedb.bulkupdate,updated),(racedb.bulkinsert,added)]
+        changes = (len(added),len(updated),len(deleted))
+    else:
+        writes = [(racedb.bulkinsert,seriesresults)]
+        changes = None
+    numresults = len(seriesresults)
+    
+    # results are written in chunks, so progress can be shown for large races
+    if progress: progress.start(sum([len(rows) for write,rows in writes]))
+    numwritten = 0
+    for write,rows in writes:
+        for chunk in range(0,len(rows),chunksize):
+            write(session,racedb.RaceResult,rows[chunk:chunk+chunksize])
+            racedb.flushexpunge(session,racedb.RaceResult)
+            numwritten += len(rows[chunk:chunk+chunksize])
+            if progress: progress.update(numwritten)
+    
+    # return number of results recorded
+    return numresults,changes
 
-            numresults = len(dbresults)
-            for rrndx in range(numresults):
-                raceresult = dbresults[rrndx]
-            
-                # set place if it has not been set before
-                # place may have been determined at previous iteration, if a tie was detected
-                if not raceresult.agtimeplace:
-                    thisplace = rrndx+1
-                    tieindeces = [rrndx]
-                    
-                    # detect tie in subsequent results based on rendering,
-                    # which rounds to a specific precision based on distance
-                    time = render.rendertime(raceresult.agtime,agtimeprecision)
-                    for tiendx in range(rrndx+1,numresults):
-                        if render.rendertime(dbresults[tiendx].agtime,agtimeprecision) != time:
-                            break
-                        tieindeces.append(tiendx)
-                    lasttie = tieindeces[-1] + 1
-                    for tiendx in tieindeces:
-                        numsametime = len(tieindeces)
-                        if numsametime > 1 and series.averagetie:
-                            dbresults[tiendx].agtimeplace = (thisplace+lasttie) / 2.0
-                            #if dbresults[tiendx].agtimeplace == (thisplace+lasttie) / 2:
-                            #    dbresults[tiendx].agtimeplace = int(dbresults[tiendx].agtimeplace)
-                        else:
-                            dbresults[tiendx].agtimeplace = thisplace
-
-    # return number of entries processed
-    return numentries
+#----------------------------------------------------------------------
+def diffresults(session,race,series,seriesresults): 
+#----------------------------------------------------------------------
+    '''
+    determine the differences between new results and previously recorded results for a race and series
+    
+    new results are matched to recorded results by runner.  Results which are unchanged,
+    including places, don't need to be written, and keep their ids
+    
+    :param session: database session
+    :param race: racedb.Race object
+    :param series: racedb.Series object
+    :param seriesresults: list of racedb.RaceResult column mappings, as created in :func:`tabulate`
+    :rtype: (column mappings to add, column mappings with id to update, ids to delete)
+    '''
+    # recorded results by runner -- runner may be in the race more than once, e.g., if two results matched the same member
+    # rows are read without the ORM, so they don't fill the session
+    recorded = collections.defaultdict(list)
+    table = racedb.RaceResult.__table__
+    
+    # float columns may be stored with less precision than they're calculated with, e.g., mysql FLOAT,
+    # so they're compared within a tolerance
+    floatcolumns = set([column.name for column in table.columns if isinstance(column.type,Float)])
+    def changed(column,oldvalue,newvalue):
+        if column in floatcolumns and oldvalue is not None and newvalue is not None:
+            return not math.isclose(oldvalue,newvalue,rel_tol=1e-6)
+        return oldvalue != newvalue
+    
+    for raceresult in session.execute(table.select().where(table.c.raceid==race.id).where(table.c.seriesid==series.id).order_by(table.c.id)):
+        recorded[raceresult.runnerid].append(raceresult)
+    
+    added = []
+    updated = []
+    for newresult in seriesresults:
+        if not recorded[newresult['runnerid']]:
+            added.append(newresult)
+            continue
+        
+        oldresult = recorded[newresult['runnerid']].pop(0)
+        if any([changed(column,oldresult[table.c[column]],value) for column,value in list(newresult.items())]):
+            updated.append(dict(newresult,id=oldresult.id))
+    
+    # anything left over is no longer in the results
+    deleted = [oldresult.id for oldresults in list(recorded.values()) for oldresult in oldresults]
+    
+    return added,updated,deleted
+
+#----------------------------------------------------------------------
+def getnames(namefile): 
+#----------------------------------------------------------------------
+    '''
+    get list of names from a file in the same format as "close-<resultsfile>.csv", e.g., exclude file
+    
+    :param namefile: name of file, or None
+    :rtype: list of 'results name' from the file, empty if namefile is None
+    '''
+    names = []
+    if namefile is not None:
+        with open(namefile,'r',newline='') as NAMES:
+            for row in csv.DictReader(NAMES):
+                names.append(row['results name'])
+    return names
+
+#----------------------------------------------------------------------
+def getconfirmed(closefile): 
+#----------------------------------------------------------------------
+    '''
+    get close matches which have been reviewed from a file in the same format as "close-<resultsfile>.csv"
+    
+    :param closefile: name of file, or None
+    :rtype: {'results name':'database name', ...} from the file, empty if closefile is None
+    '''
+    confirmed = {}
+    if closefile is not None:
+        with open(closefile,'r',newline='') as CLOSE:
+            for row in csv.DictReader(CLOSE):
+                confirmed[row['results name']] = row['database name']
+    return confirmed
+
+#----------------------------------------------------------------------
+def getseries(session,raceid): 
+#----------------------------------------------------------------------
+    '''
+    get the series a race is in
+    
+    :param session: database session
+    :param raceid: id of race
+    :rtype: list of racedb.Series objects
+    '''
+    # TODO: there's probably a cleaner way to do this filter
+    raceseries = session.query(racedb.RaceSeries).filter_by(raceid=raceid,active=True).all()
+    seriesids = [s.seriesid for s in raceseries]
+    theseseries = []
+    for seriesid in seriesids:
+        theseseries.append(session.query(racedb.Series).filter_by(id=seriesid,active=True).first())
+    return theseseries
+
+#----------------------------------------------------------------------
+def openlog(resultsfile,logtype,fields): 
+#----------------------------------------------------------------------
+    '''
+    open a log file, named after the results file and kept with it
+    
+    :param resultsfile: file containing results
+    :param logtype: type of log, e.g., 'missed' for <resultsfile>-missed.csv
+    :param fields: list of log file columns
+    :rtype: (filehandle, csv.DictWriter)
+    '''
+    logdir = os.path.dirname(resultsfile)
+    resultfilebase = os.path.basename(resultsfile)
+    logname = '{0}-{1}.csv'.format(os.path.splitext(resultfilebase)[0],logtype)
+    LOG = open(os.path.join(logdir,logname),'w',newline='')
+    LOGCSV = csv.DictWriter(LOG,fields)
+    LOGCSV.writeheader()
+    return LOG,LOGCSV
+
+#----------------------------------------------------------------------
+def matchkey(result): 
+#----------------------------------------------------------------------
+    '''
+    return the values of a result which are used to match it, e.g., place isn't included,
+    as it changes for all the entries after an entry which is added or removed
+    
+    :param result: result from :class:`raceresults.RaceResults`
+    :rtype: tuple of values for MATCHKEYFIELDS, None for fields which aren't in the results file
+    '''
+    return tuple([result[field] if field in result else None for field in MATCHKEYFIELDS])
+
+#----------------------------------------------------------------------
+def matchedfilename(resultsfile): 
+#----------------------------------------------------------------------
+    '''
+    return the name of the file which keeps the matched entries from the last import of a results file,
+    named after the results file and kept with it, as for the log files
+    
+    :param resultsfile: file containing results
+    :rtype: <resultsfile>-matched.pickle
+    '''
+    logdir = os.path.dirname(resultsfile)
+    resultfilebase = os.path.basename(resultsfile)
+    return os.path.join(logdir,'{0}-matched.pickle'.format(os.path.splitext(resultfilebase)[0]))
+
+#----------------------------------------------------------------------
+def savematched(resultsfile,context,entries): 
+#----------------------------------------------------------------------
+    '''
+    keep the matched entries from this import of a results file, so a corrected file can be imported
+    with --incremental without matching the entries which are unchanged
+    
+    :param resultsfile: file containing results
+    :param context: anything else the matching depended on, e.g., race and exclude file names, see :func:`loadmatched`
+    :param entries: :attr:`MatchedRace.entries`, after :func:`recordmatches` has filled in runner ids
+    '''
+    # finishers are kept as tuples of their attributes
+    entries = [(entrykey,tuple([getattr(finisher,attr) for attr in Finisher.__slots__]) if finisher else None) for entrykey,finisher in entries]
+    
+    # not being able to keep the entries only costs time for the next --incremental import
+    try:
+        with open(matchedfilename(resultsfile),'wb') as MATCHED:
+            pickle.dump({'context':context,'entries':entries},MATCHED,pickle.HIGHEST_PROTOCOL)
+    except IOError:
+        pass
+
+#----------------------------------------------------------------------
+def loadmatched(resultsfile,context): 
+#----------------------------------------------------------------------
+    '''
+    get the matched entries from the last import of a results file, see :func:`savematched`
+    
+    :param resultsfile: file containing results
+    :param context: must be the same as when the entries were kept, else they aren't used
+    :rtype: {:func:`matchkey`:[:class:`Finisher` or None, ...], ...}, or None if not available
+    '''
+    try:
+        with open(matchedfilename(resultsfile),'rb') as MATCHED:
+            matched = pickle.load(MATCHED)
+    # missing or damaged file means everything is matched again
+    except Exception:
+        return None
+    if matched['context'] != context:
+        return None
+    
+    previous = collections.defaultdict(list)
+    for entrykey,values in matched['entries']:
+        finisher = None
+        if values:
+            finisher = Finisher.__new__(Finisher)
+            for attr,value in zip(Finisher.__slots__,values):
+                setattr(finisher,attr,value)
+        previous[entrykey].append(finisher)
+    return previous
 
 #----------------------------------------------------------------------
 def main(): 
@@ -404,8 +839,14 @@ def main():
     parser.add_argument('-f','--resultsfile',help='file with results information',default=None)
     parser.add_argument('-e','--excludefile',help='file with list of racers to exclude, same format as "close-<resultsfile>.csv"',default=None)
     parser.add_argument('-n','--nonmemberfile',help='file with list of racers known to be nonmembers, same format as "close-<resultsfile>.csv"',default=None)
+    parser.add_argument('--confirmclose',help='reviewed "close-<resultsfile>.csv", close matches listed are remembered so later imports skip matching for them (use namematches to remove)',default=None)
     parser.add_argument('-F','--force',help='force action without user prompt',action='store_true')
     parser.add_argument('-d','--delete',help='delete results for this race',action='store_true')
+    parser.add_argument('-i','--incremental',help='update previously recorded results for this race, e.g., for corrected results file, matching only the entries which changed since this file was last imported, and writing only the differences',action='store_true')
+    parser.add_argument('-s','--commitseries',help='commit after collecting results and after each series, so an interrupted import can be continued with --resume',action='store_true')
+    parser.add_argument('--resume',help='continue an interrupted --commitseries import, skipping series which already have results for this race',action='store_true')
+    parser.add_argument('--parsecache',help='keep the parsed results file in the parse cache, so importing the same file again, e.g., after fixing the exclude file, does not parse it again',action='store_true')
+    parser.add_argument('-k','--chunksize',help='number of results written between flushes and progress updates (default %(default)d)',type=int,default=CHUNKSIZE)
     parser.add_argument('-c','--cutoff',help='cutoff for close match lookup (default %(default)0.2f)',type=float,default=0.7)
     parser.add_argument('-r','--racedb',help='filename of race database (default is as configured during rcuserconfig)',default=None)
     parser.add_argument('--debug',help='if set, create updateraces.txt for debugging',action='store_true')
@@ -417,6 +858,15 @@ def main():
     excludefile = args.excludefile
     nonmemberfile = args.nonmemberfile
     force = args.force
+    incremental = args.incremental
+    resume = args.resume
+    
+    if incremental and args.delete:
+        print('*** --incremental and --delete cannot be used together')
+        return
+    if resume and (incremental or args.delete):
+        print('*** --resume cannot be used with --incremental or --delete')
+        return
     
     if args.debug:
         global DEBUG
@@ -458,6 +908,10 @@ def main():
     if results:
         if args.delete:
             exists = '(previously entered race results will be deleted)'
+        elif resume:
+            exists = '(NOTE: race results already entered will be kept)'
+        elif incremental:
+            exists = '(NOTE: race results already entered, and will be updated)'
         else:
             exists = '(NOTE: race results already entered, and will be overwritten)'
     elif args.delete:
@@ -474,77 +928,112 @@ def main():
             print('*** race update aborted -- no changes made')
             return
     
-    # first delete all results for this race
-    numdeleted = session.query(racedb.RaceResult).filter_by(raceid=raceid).delete()
-    if numdeleted:
-        print('deleted {0} entries previously recorded'.format(numdeleted))
+    # first delete all results for this race, unless results are to be updated or resumed
+    if not incremental and not resume:
+        numdeleted = session.query(racedb.RaceResult).filter_by(raceid=raceid).delete()
+        if numdeleted:
+            print('deleted {0} entries previously recorded'.format(numdeleted))
         
     # only actually update results if --delete option not selected
     if not args.delete:
         
         # get list of excluded racers from excludefile
-        excluded = []
-        if excludefile is not None:
-            with open(excludefile,'r',newline='') as excl:
-                exclc = csv.DictReader(excl)
-                for row in exclc:
-                    excluded.append(row['results name'])
+        excluded = getnames(excludefile)
         
         # get list of forced inclusions from nonmemberfile
-        nonmemforced = []
-        if nonmemberfile is not None:
-            with open(nonmemberfile,'r',newline='') as nonm:
-                nonmc = csv.DictReader(nonm)
-                for row in nonmc:
-                    nonmemforced.append(row['results name'])
-        
-        # TODO: there's probably a cleaner way to do this filter
-        raceseries = session.query(racedb.RaceSeries).filter_by(raceid=raceid,active=True).all()
-        seriesids = [s.seriesid for s in raceseries]
-        theseseries = []
-        for seriesid in seriesids:
-            theseseries.append(session.query(racedb.Series).filter_by(id=seriesid,active=True).first())
+        nonmemforced = getnames(nonmemberfile)
+        
+        # excluded and forced nonmember names must not be matched from previous decisions
+        racedb.clearnamematches(session,excluded+nonmemforced)
+        
+        # close matches listed in the reviewed close file are remembered as confirmed
+        confirmclose = getconfirmed(args.confirmclose)
+        
+        theseseries = getseries(session,raceid)
+        seriesids = [series.id for series in theseseries]
+        
+        # members' divisions for the season are refreshed, as members' dates of birth or the series' divisions may have changed
+        divisions.updateseason(session,race.year)
+        
+        # when updating, results for series this race is no longer in are deleted
+        if incremental:
+            numdeleted = session.query(racedb.RaceResult).filter(racedb.RaceResult.raceid==raceid,~racedb.RaceResult.seriesid.in_(seriesids)).delete(synchronize_session=False)
+            if numdeleted:
+                print('deleted {0} entries previously recorded for other series'.format(numdeleted))
         
         # set up logging files
-        logdir = os.path.dirname(resultsfile)
-        resultfilebase = os.path.basename(resultsfile)
-        inactlogname = '{0}-inactive.csv'.format(os.path.splitext(resultfilebase)[0])
-        INACT = open(os.path.join(logdir,inactlogname),'w',newline='')
-        INACTCSV = csv.DictWriter(INACT,['results name','results age','database name','database dob','ratio'])
-        INACTCSV.writeheader()
-        missedlogname = '{0}-missed.csv'.format(os.path.splitext(resultfilebase)[0])
-        MISSED = open(os.path.join(logdir,missedlogname),'w',newline='')
-        MISSEDCSV = csv.DictWriter(MISSED,['results name','results age','database name','database dob','ratio'])
-        MISSEDCSV.writeheader()
-        closelogname = '{0}-close.csv'.format(os.path.splitext(resultfilebase)[0])
-        CLOSE = open(os.path.join(logdir,closelogname),'w',newline='')
-        CLOSECSV = csv.DictWriter(CLOSE,['results name','results age','database name','database dob','ratio'])
-        CLOSECSV.writeheader()
-        nonmemlogname = '{0}-nonmem.csv'.format(os.path.splitext(resultfilebase)[0])
-        NONMEM = open(os.path.join(logdir,nonmemlogname),'w',newline='')
-        NONMEMCSV = csv.DictWriter(NONMEM,['results name','results age','new','runner id'])
-        NONMEMCSV.writeheader()
+        INACT,INACTCSV = openlog(resultsfile,'inactive',MATCHLOGFIELDS)
+        MISSED,MISSEDCSV = openlog(resultsfile,'missed',MATCHLOGFIELDS)
+        CLOSE,CLOSECSV = openlog(resultsfile,'close',MATCHLOGFIELDS)
+        NONMEM,NONMEMCSV = openlog(resultsfile,'nonmem',NONMEMLOGFIELDS)
+        
+        # results file is parsed, matched and age graded once for all the series
+        # nonmembers are only needed if some series is not for members only
+        membersonly = all([series.membersonly for series in theseseries])
+        # when updating, entries which are unchanged from the last import of this file aren't matched again
+        # anything the matching depended on must be the same, else everything is matched again
+        context = (racedbfile,race.id,race.date,race.distance,membersonly,sorted(excluded),sorted(nonmemforced),sorted(confirmclose.items()))
+        previous = loadmatched(resultsfile,context) if incremental else None
+        print('collecting results from {0}'.format(resultsfile))
+        progress = Progress('matching','entries')
+        matched = matchresults(session,race,resultsfile,excluded,nonmemforced,membersonly,active,inactive,nonmember,MISSEDCSV,CLOSECSV,confirmclose,args.chunksize,progress,args.parsecache,previous)
+        finishers,numentries = recordmatches(session,race,matched,NONMEMCSV,args.chunksize)
+        savematched(resultsfile,context,matched.entries)
+        progress.done()
+        if previous is not None:
+            print('   {0} entries processed, {1} unchanged'.format(numentries,matched.numreused))
+        else:
+            print('   {0} entries processed'.format(numentries))
+        MISSED.close()
+        CLOSE.close()
+        NONMEM.close()
+        if args.commitseries:
+            session.commit()
+        
+        # when resuming, series which already have results were completed by the interrupted import
+        recorded = set()
+        if resume:
+            recorded = set([seriesid for seriesid, in session.query(racedb.RaceResult.seriesid).filter_by(raceid=raceid).distinct()])
         
         # for each series - 'series' describes how to tabulate the results
+        failed = []
         for series in theseseries:
+            if series.id in recorded:
+                print('skipping {0}, results already recorded'.format(series.name))
+                continue
+            
             # tabulate each race for which there are results, if it hasn't been tabulated before
+            # each series is in its own savepoint, so a series which fails doesn't lose the others
             print('tabulating {0}'.format(series.name))
-            numentries = tabulate(session,race,resultsfile,excluded,nonmemforced,series,active,inactive,nonmember,INACTCSV,MISSEDCSV,CLOSECSV,NONMEMCSV)
-            print('   {0} entries processed'.format(numentries))
+            progress = Progress(series.name,'results')
+            savepoint = session.begin_nested()
+            try:
+                numresults,changes = tabulate(session,race,series,finishers,INACTCSV,incremental,args.chunksize,progress)
+            except (dbConsistencyError,DBAPIError) as e:
+                savepoint.rollback()
+                progress.done()
+                print('*** {0} results not recorded: {1}'.format(series.name,e))
+                failed.append(series.name)
+            else:
+                savepoint.commit()
+                progress.done()
+                if changes:
+                    print('   {0} results recorded ({1} added, {2} updated, {3} deleted)'.format(numresults,*changes))
+                else:
+                    print('   {0} results recorded'.format(numresults))
+                if args.commitseries:
+                    session.commit()
             
-            # only collect log entries for the first series
+            # only collect inactive log entries for the first series
             if INACTCSV:
                 INACT.close()
                 INACTCSV = None
-            if MISSEDCSV:
-                MISSED.close()
-                MISSEDCSV = None
-            if CLOSECSV:
-                CLOSE.close()
-                CLOSECSV = None
-            if NONMEMCSV:
-                NONMEM.close()
-                NONMEMCSV = None
+    
+        if failed:
+            if args.commitseries:
+                print('*** results not recorded for {0}, fix and rerun with --commitseries --resume'.format(', '.join(failed)))
+            else:
+                print('*** results not recorded for {0}'.format(', '.join(failed)))
     
     # and we're through
     session.commit()
@@ -0,0 +1,304 @@
+#!/usr/bin/python
+###########################################################################################
+#   importseason - import results for many races
+#
+#       Date            Author          Reason
+#       ----            ------          ------
+#       10/19/26        Lou King        Create
+#
+#   Copyright 2026 Lou King
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+###########################################################################################
+'''
+importseason - import results for many races
+===========================================================================
+
+The races to be imported are given by a manifest csv file with columns 'raceid', 'file',
+'exclude', 'nonmember' and 'confirmclose'.  'file' is the results file, and 'exclude', 'nonmember'
+and 'confirmclose' are optional exclude, nonmember and reviewed close files, as for :mod:`importresults`.  Relative filenames in
+the manifest are relative to the manifest.
+
+Member pools are loaded once for the whole season.  Races are parsed, matched and age graded
+concurrently, each in a worker process, using :func:`importresults.matchresults`, which
+doesn't update the database.  The main process is the only writer.  It records the results
+for each race in manifest order, committing after each race.  New nonmembers are created
+by the writer, so a nonmember who ran several races is only added once.
+
+Each race is matched against its own copy of the member pools as they were loaded, so the
+matching doesn't depend on which races a worker process happened to match before.  A new
+nonmember found in one race isn't known when matching another race, so nonmembers' names are
+matched exactly across races when the results are recorded.
+'''
+
+# standard
+import pdb
+import argparse
+import os.path
+import csv
+import copy
+from concurrent.futures import ProcessPoolExecutor
+
+# pypi
+from sqlalchemy.exc import DBAPIError
+
+# github
+
+# other
+
+# home grown
+from .config import parameterError, dbConsistencyError
+from . import version
+from . import racedb
+from . import clubmember
+from . import raceresults
+from . import importresults
+from . import divisions
+
+# member pools for worker processes, set by _initworker()
+_pools = {}
+
+#----------------------------------------------------------------------
+def getmanifest(manifest):
+#----------------------------------------------------------------------
+    '''
+    get races to be imported from manifest file
+
+    :param manifest: csv file with columns 'raceid', 'file', 'exclude', 'nonmember', 'confirmclose'
+    :rtype: list of (raceid,resultsfile,excludefile,nonmemberfile,confirmfile), excludefile, nonmemberfile and confirmfile are None if not given
+    '''
+    manifestdir = os.path.dirname(manifest)
+    races = []
+    with open(manifest,'r',newline='') as MANIFEST:
+        for row in csv.DictReader(MANIFEST):
+            files = [os.path.join(manifestdir,row[f]) if row.get(f) else None for f in ['file','exclude','nonmember','confirmclose']]
+            races.append(tuple([int(row['raceid'])] + files))
+    return races
+
+#----------------------------------------------------------------------
+def _initworker(racedbfile,active,inactive,nonmember):
+#----------------------------------------------------------------------
+    '''
+    initialize worker process with database and member pools
+    '''
+    racedb.setracedb(racedbfile)
+    _pools['active'] = active
+    _pools['inactive'] = inactive
+    _pools['nonmember'] = nonmember
+
+#----------------------------------------------------------------------
+def matchrace(raceid,resultsfile,excludefile,nonmemberfile,confirmfile,membersonly,parsecache=False):
+#----------------------------------------------------------------------
+    '''
+    parse, match and age grade the results for a race
+
+    this is run within a worker process, so errors in the file are returned rather than raised.
+    Any error is returned, so that one bad file doesn't stop the races after it from being recorded
+
+    new nonmembers are added to a copy of the nonmember pool, so they aren't seen by the next race
+    matched in this worker process
+
+    :param raceid: id of race
+    :param resultsfile: file containing results
+    :param excludefile: file with list of racers to exclude, or None
+    :param nonmemberfile: file with list of racers known to be nonmembers, or None
+    :param confirmfile: reviewed close file, whose close matches are remembered as confirmed, or None
+    :param membersonly: True if all series for this race are for members only
+    :param parsecache: True to use the parse cache, see :func:`importresults.matchresults`
+    :rtype: (:class:`importresults.MatchedRace` or None, error string or None)
+    '''
+    session = racedb.Session()
+    race = session.query(racedb.Race).filter_by(id=raceid,active=True).first()
+
+    MISSED = CLOSE = None
+    try:
+        MISSED,MISSEDCSV = importresults.openlog(resultsfile,'missed',importresults.MATCHLOGFIELDS)
+        CLOSE,CLOSECSV = importresults.openlog(resultsfile,'close',importresults.MATCHLOGFIELDS)
+        excluded = importresults.getnames(excludefile)
+        nonmemforced = importresults.getnames(nonmemberfile)
+
+        # close matches listed in the reviewed close file are remembered as confirmed
+        confirmclose = importresults.getconfirmed(confirmfile)
+        matched = importresults.matchresults(session,race,resultsfile,excluded,nonmemforced,membersonly,
+                                             _pools['active'],_pools['inactive'],copy.deepcopy(_pools['nonmember']),MISSEDCSV,CLOSECSV,confirmclose,
+                                             parsecache=parsecache)
+
+    except (raceresults.headerError,parameterError,IOError) as e:
+        return None,str(e)
+
+    # e.g., ValueError for time which can't be decoded
+    except Exception as e:
+        return None,'{0} {1}'.format(type(e).__name__,e)
+
+    finally:
+        if MISSED: MISSED.close()
+        if CLOSE: CLOSE.close()
+        session.close()
+
+    return matched,None
+
+#----------------------------------------------------------------------
+def recordrace(session,race,resultsfile,matched):
+#----------------------------------------------------------------------
+    '''
+    record the results for a race, replacing any results previously recorded
+
+    :param session: database session
+    :param race: racedb.Race object
+    :param resultsfile: file containing results
+    :param matched: :class:`importresults.MatchedRace` from :func:`matchrace`
+    :rtype: {seriesname:numresults, ...}
+    '''
+    session.query(racedb.RaceResult).filter_by(raceid=race.id).delete()
+
+    NONMEM,NONMEMCSV = importresults.openlog(resultsfile,'nonmem',importresults.NONMEMLOGFIELDS)
+    finishers,numentries = importresults.recordmatches(session,race,matched,NONMEMCSV)
+    NONMEM.close()
+
+    # only collect inactive log entries for the first series
+    INACT,INACTCSV = importresults.openlog(resultsfile,'inactive',importresults.MATCHLOGFIELDS)
+    numresults = {}
+    for series in importresults.getseries(session,race.id):
+        numresults[series.name],changes = importresults.tabulate(session,race,series,finishers,INACTCSV)
+        INACTCSV = None
+    INACT.close()
+
+    return numresults
+
+#----------------------------------------------------------------------
+def importseason(racedbfile,races,cutoff=0.7,workers=None,parsecache=False):
+#----------------------------------------------------------------------
+    '''
+    import results for many races, recording the results for each race in order
+
+    :param racedbfile: filename of race database
+    :param races: list of (raceid,resultsfile,excludefile,nonmemberfile,confirmfile), as from :func:`getmanifest`
+    :param cutoff: cutoff for close match lookup
+    :param workers: number of worker processes, default is number of processors
+    :param parsecache: True to use the parse cache for the results files, see :func:`importresults.matchresults`
+    :rtype: list of (raceid, {seriesname:numresults, ...} or None, error string or None), in same order as races
+    '''
+    # get active and inactive members, as well as nonmembers
+    active = clubmember.DbClubMember(racedbfile,cutoff=cutoff,member=True,active=True)
+    inactive = clubmember.DbClubMember(racedbfile,cutoff=cutoff,member=True,active=False)
+
+    # insist on high cutoff for nonmember matching
+    NONMEMBERCUTOFF = 0.9
+    nonmember = clubmember.DbClubMember(racedbfile,cutoff=NONMEMBERCUTOFF,member=False)
+
+    racedb.setracedb(racedbfile)
+    session = racedb.Session()
+
+    # excluded and forced nonmember names must not be matched from previous decisions
+    # nonmembers are only needed if some series is not for members only
+    membersonly = {}
+    years = set()
+    for raceid,resultsfile,excludefile,nonmemberfile,confirmfile in races:
+        racedb.clearnamematches(session,importresults.getnames(excludefile)+importresults.getnames(nonmemberfile))
+        membersonly[raceid] = all([series.membersonly for series in importresults.getseries(session,raceid)])
+        years.add(session.query(racedb.Race).filter_by(id=raceid,active=True).first().year)
+    
+    # members' divisions are filled in for each season being loaded
+    for year in years:
+        divisions.updateseason(session,year)
+    session.commit()
+
+    # worker processes must not share this process' pooled database connections
+    session.close()
+    session.get_bind().dispose()
+
+    # races are matched concurrently, but recorded in order by this process
+    results = []
+    with ProcessPoolExecutor(max_workers=workers,initializer=_initworker,initargs=(racedbfile,active,inactive,nonmember)) as pool:
+        futures = [pool.submit(matchrace,raceid,resultsfile,excludefile,nonmemberfile,confirmfile,membersonly[raceid],parsecache)
+                   for raceid,resultsfile,excludefile,nonmemberfile,confirmfile in races]
+
+        for (raceid,resultsfile,excludefile,nonmemberfile,confirmfile),future in zip(races,futures):
+            matched,error = future.result()
+            if error:
+                results.append((raceid,None,error))
+                continue
+
+            # each race is in its own savepoint, so a race which fails doesn't stop the races after it
+            savepoint = session.begin_nested()
+            try:
+                race = session.query(racedb.Race).filter_by(id=raceid,active=True).first()
+                numresults = recordrace(session,race,resultsfile,matched)
+            except (dbConsistencyError,DBAPIError,IOError) as e:
+                savepoint.rollback()
+                results.append((raceid,None,'{0} {1}'.format(type(e).__name__,e)))
+            else:
+                savepoint.commit()
+                results.append((raceid,numresults,None))
+            session.commit()
+
+    session.close()
+    return results
+
+#----------------------------------------------------------------------
+def main():
+#----------------------------------------------------------------------
+    parser = argparse.ArgumentParser(version='{0} {1}'.format('runningclub',version.__version__))
+    parser.add_argument('manifest',help='manifest csv file with columns "raceid","file","exclude","nonmember","confirmclose"')
+    parser.add_argument('-F','--force',help='force action without user prompt',action='store_true')
+    parser.add_argument('-c','--cutoff',help='cutoff for close match lookup (default %(default)0.2f)',type=float,default=0.7)
+    parser.add_argument('-r','--racedb',help='filename of race database (default is as configured during rcuserconfig)',default=None)
+    parser.add_argument('-w','--workers',help='number of worker processes (default is number of processors)',type=int,default=None)
+    parser.add_argument('--parsecache',help='keep the parsed results files in the parse cache, so importing the same files again does not parse them again',action='store_true')
+    args = parser.parse_args()
+
+    races = getmanifest(args.manifest)
+
+    if args.racedb:
+        racedbfile = args.racedb
+    else:
+        racedbfile = racedb.getdbfilename()
+
+    # verify races exist
+    racedb.setracedb(racedbfile)
+    session = racedb.Session()
+    for raceid,resultsfile,excludefile,nonmemberfile,confirmfile in races:
+        race = session.query(racedb.Race).filter_by(id=raceid,active=True).first()
+        if not race:
+            print('*** race id {0} not found in database'.format(raceid))
+            return
+        exists = ''
+        if session.query(racedb.RaceResult).filter_by(raceid=raceid).first():
+            exists = '(NOTE: race results already entered, and will be overwritten)'
+        print('   {0} {1} {2}: {3} {4}'.format(raceid,race.year,race.name,resultsfile,exists))
+    session.close()
+
+    # prompt user to verify update of these races' results, if not "forced"
+    if not args.force:
+        answer = input('update results for these {0} races? (type yes) '.format(len(races)))
+        if answer != 'yes':
+            print('*** season update aborted -- no changes made')
+            return
+
+    # report results
+    numerrors = 0
+    for raceid,numresults,error in importseason(racedbfile,races,args.cutoff,args.workers,args.parsecache):
+        if error:
+            numerrors += 1
+            print('   {0}: ERROR {1}'.format(raceid,error))
+        else:
+            print('   {0}: {1}'.format(raceid,', '.join(['{0} {1} results'.format(name,num) for name,num in list(numresults.items())])))
+
+    print('{0} races processed, {1} errors'.format(len(races),numerrors))
+
+# ##########################################################################################
+#	__main__
+# ##########################################################################################
+if __name__ == "__main__":
+    main()
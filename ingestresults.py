@@ -0,0 +1,214 @@
+#!/usr/bin/python
+###########################################################################################
+#   ingestresults - parse many results files into a normalized staging area
+#
+#       Date            Author          Reason
+#       ----            ------          ------
+#       10/19/26        Lou King        Create
+#
+#   Copyright 2026 Lou King
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+###########################################################################################
+'''
+ingestresults - parse many results files into a normalized staging area
+===========================================================================
+
+Results files are parsed concurrently, each in its own process, and each is written
+to the staging directory as a csv file with the columns in STAGEDFIELDS.  Time is
+in seconds.
+
+Staged files have a header which :class:`raceresults.RaceResults` recognizes, so later
+import steps can read the staged file in place of the original results file.
+
+Header errors, invalid time errors and any other error parsing a file are collected per
+file, reported when the batch is complete, and written to ingest-errors.csv in the staging
+directory.  A file with an error doesn't stop the other files from being staged.
+
+Staged files are named after the results file, including its extension, with a hash of
+its full path, so that files with the same name in different directories don't collide.
+
+The files to be ingested are given by a directory, in which case all the files in the
+directory are ingested with the same distance, or by a manifest csv file with columns
+'file' and 'distance'.  Relative filenames in the manifest are relative to the manifest.
+'''
+
+# standard
+import pdb
+import argparse
+import os
+import os.path
+import csv
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+# pypi
+
+# github
+
+# other
+
+# home grown
+from .config import parameterError
+from . import version
+from . import raceresults
+
+# columns of staged file
+STAGEDFIELDS = ['place','name','gender','age','time','hometown']
+
+# file which collects errors for the batch
+ERRORFILE = 'ingest-errors.csv'
+
+#----------------------------------------------------------------------
+def stagedfilename(resultsfile,stagedir):
+#----------------------------------------------------------------------
+    '''
+    return the name of the staged file for a results file
+
+    :param resultsfile: name of original results file
+    :param stagedir: directory for staged files
+    :rtype: name of staged file, unique for each results file path
+    '''
+    resultsfilebase = os.path.basename(resultsfile)
+    pathhash = hashlib.sha1(os.path.abspath(resultsfile).encode('utf-8')).hexdigest()[:8]
+    return os.path.join(stagedir,'{0}-{1}-staged.csv'.format(resultsfilebase,pathhash))
+
+#----------------------------------------------------------------------
+def stagefile(resultsfile,distance,stagedir):
+#----------------------------------------------------------------------
+    '''
+    parse a results file and write it to the staging directory
+
+    this is run within a worker process, so errors in the file are returned rather than raised
+
+    :param resultsfile: name of results file
+    :param distance: distance of race (miles)
+    :param stagedir: directory for staged files
+    :rtype: (resultsfile, stagedfile, number of rows, error string or None)
+    '''
+    stagedfile = stagedfilename(resultsfile,stagedir)
+
+    # write to a temporary file so that a failed parse doesn't leave a partial staged file
+    tempfile = stagedfile + '.tmp'
+    numrows = 0
+    try:
+        rr = raceresults.RaceResults(resultsfile,distance)
+        with open(tempfile,'w',newline='') as STAGED:
+            STAGEDCSV = csv.DictWriter(STAGED,STAGEDFIELDS)
+            STAGEDCSV.writeheader()
+            for result in rr:
+                # hometown may have been given in pieces
+                hometown = result.get('hometown')
+                if hometown is None:
+                    hometown = ', '.join([str(h).strip() for h in [result.get('city'),result.get('state')] if h])
+                STAGEDCSV.writerow({'place':result.get('place'),'name':result['name'],'gender':result['gender'],
+                                    'age':result['age'],'time':result['time'],'hometown':hometown})
+                numrows += 1
+        os.replace(tempfile,stagedfile)
+
+    except (raceresults.headerError,parameterError,IOError) as e:
+        error = str(e)
+
+    # e.g., ValueError for time which can't be decoded -- this must not stop the rest of the batch
+    except Exception as e:
+        error = '{0} {1}'.format(type(e).__name__,e)
+
+    else:
+        error = None
+
+    if error:
+        if os.path.exists(tempfile):
+            os.remove(tempfile)
+        return resultsfile,None,numrows,error
+
+    return resultsfile,stagedfile,numrows,None
+
+#----------------------------------------------------------------------
+def getmanifest(manifest):
+#----------------------------------------------------------------------
+    '''
+    get files to be ingested from manifest file
+
+    :param manifest: csv file with columns 'file' and 'distance'
+    :rtype: list of (resultsfile,distance)
+    '''
+    manifestdir = os.path.dirname(manifest)
+    files = []
+    with open(manifest,'r',newline='') as MANIFEST:
+        for row in csv.DictReader(MANIFEST):
+            files.append((os.path.join(manifestdir,row['file']),float(row['distance'])))
+    return files
+
+#----------------------------------------------------------------------
+def ingest(files,stagedir,workers=None):
+#----------------------------------------------------------------------
+    '''
+    parse results files concurrently, writing each to the staging directory
+
+    :param files: list of (resultsfile,distance)
+    :param stagedir: directory for staged files
+    :param workers: number of worker processes, default is number of processors
+    :rtype: list of (resultsfile, stagedfile, number of rows, error string or None), in same order as files
+    '''
+    if not os.path.exists(stagedir):
+        os.makedirs(stagedir)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(stagefile,resultsfile,distance,stagedir) for resultsfile,distance in files]
+        return [future.result() for future in futures]
+
+#----------------------------------------------------------------------
+def main():
+#----------------------------------------------------------------------
+    parser = argparse.ArgumentParser(version='{0} {1}'.format('runningclub',version.__version__))
+    parser.add_argument('source',help='directory of results files, or manifest csv file with columns "file","distance"')
+    parser.add_argument('stagedir',help='directory for staged files')
+    parser.add_argument('-d','--distance',help='distance of races (miles), required if source is a directory',type=float,default=None)
+    parser.add_argument('-w','--workers',help='number of worker processes (default is number of processors)',type=int,default=None)
+    args = parser.parse_args()
+
+    source = args.source
+    stagedir = args.stagedir
+
+    # get list of files to ingest
+    if os.path.isdir(source):
+        if args.distance is None:
+            raise parameterError('--distance required when source is a directory')
+        files = [(os.path.join(source,f),args.distance) for f in sorted(os.listdir(source)) if os.path.isfile(os.path.join(source,f))]
+    else:
+        files = getmanifest(source)
+
+    # parse files, collecting errors
+    results = ingest(files,stagedir,args.workers)
+
+    # report results and log errors
+    numerrors = 0
+    with open(os.path.join(stagedir,ERRORFILE),'w',newline='') as ERRORS:
+        ERRORSCSV = csv.DictWriter(ERRORS,['file','error'])
+        ERRORSCSV.writeheader()
+        for resultsfile,stagedfile,numrows,error in results:
+            if error:
+                numerrors += 1
+                ERRORSCSV.writerow({'file':resultsfile,'error':error})
+                print('   {0}: ERROR {1}'.format(resultsfile,error))
+            else:
+                print('   {0}: {1} entries staged'.format(resultsfile,numrows))
+
+    print('{0} files processed, {1} errors'.format(len(results),numerrors))
+
+# ##########################################################################################
+#	__main__
+# ##########################################################################################
+if __name__ == "__main__":
+    main()
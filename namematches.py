@@ -0,0 +1,95 @@
+#!/usr/bin/python
+###########################################################################################
+# namematches - list or remove confirmed name matches within database
+#
+#	Date		Author		Reason
+#	----		------		------
+#       10/19/26        Lou King        Create
+#
+#   Copyright 2026 Lou King
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+###########################################################################################
+'''
+namematches - list or remove confirmed name matches within database
+=====================================================================
+
+Confirmed name matches are remembered by :mod:`importresults`, so later imports skip fuzzy
+matching for those names.  A wrong match can be removed with this script.
+'''
+
+# standard
+import pdb
+import argparse
+
+# pypi
+
+# github
+
+# other
+
+# home grown
+from . import version
+from . import racedb
+
+#----------------------------------------------------------------------
+def querynamematches(session,names=[],runnerids=[]):
+#----------------------------------------------------------------------
+    '''
+    get confirmed name matches for names found in results files, or for runners
+
+    :param session: database session
+    :param names: list of names as found in results files
+    :param runnerids: list of runner.id
+    :rtype: query for racedb.NameMatch
+    '''
+    resultnames = [name.strip().lower() for name in names]
+    return session.query(racedb.NameMatch).filter(racedb.NameMatch.resultname.in_(resultnames) | racedb.NameMatch.runnerid.in_(runnerids))
+
+#----------------------------------------------------------------------
+def main():
+#----------------------------------------------------------------------
+    '''
+    list or remove confirmed name matches
+    '''
+    parser = argparse.ArgumentParser(version='{0} {1}'.format('runningclub',version.__version__))
+    parser.add_argument('-n','--name',help='name as found in results file, may be repeated',action='append',default=[])
+    parser.add_argument('-u','--runnerid',help='runner id, may be repeated',action='append',type=int,default=[])
+    parser.add_argument('-d','--delete',help='remove the matches which are listed',action='store_true')
+    parser.add_argument('-r','--racedb',help='filename of race database (default is as configured during rcuserconfig)',default=None)
+    args = parser.parse_args()
+
+    racedb.setracedb(args.racedb)
+    session = racedb.Session()
+
+    namematches = querynamematches(session,args.name,args.runnerid)
+    cols = '{0:30s} {1:6s} {2:11s} {3:8s} {4}'
+    print(cols.format('results name','gender','birth years','runnerid','runner'))
+    for namematch in namematches.order_by(racedb.NameMatch.resultname,racedb.NameMatch.birthyearlow):
+        runner = session.query(racedb.Runner).get(namematch.runnerid)
+        print(cols.format(namematch.resultname,namematch.gender,'{0}-{1}'.format(namematch.birthyearlow,namematch.birthyearhigh),
+                          str(namematch.runnerid),'{0} {1}'.format(runner.name,runner.dateofbirth) if runner else ''))
+
+    if args.delete:
+        numdeleted = namematches.delete(synchronize_session=False)
+        session.commit()
+        print('removed {0} matches'.format(numdeleted))
+
+    session.close()
+
+# ##########################################################################################
+#	__main__
+# ##########################################################################################
+if __name__ == "__main__":
+    main()
@@ -34,6 +34,7 @@ racedb has the following tables.  See classes of same name (with camelcase) for
     * raceseries
     * series
     * divisions
+    * namematch
        
 '''
 
@@ -51,7 +52,7 @@ from Crypto.PublicKey import RSA
 import sqlalchemy   # see http://www.sqlalchemy.org/ written with 0.8.0b2
 from sqlalchemy.ext.declarative import declarative_base
 Base = declarative_base()   # create sqlalchemy Base class
-from sqlalchemy import Column, Integer, Float, Boolean, String, Sequence, UniqueConstraint, ForeignKey
+from sqlalchemy import Column, Integer, Float, Boolean, String, Sequence, UniqueConstraint, ForeignKey, Index
 from sqlalchemy.orm import sessionmaker, object_mapper, relationship, backref
 Session = sessionmaker()    # create sqalchemy Session class
 
@@ -240,6 +241,68 @@ def insert_or_update(session, model, newinstance, skipcolumns=[], **kwargs):
         
     return updated
 
+#----------------------------------------------------------------------
+def bulkinsert(session, model, mappings):
+#----------------------------------------------------------------------
+    '''
+    insert many rows in one executemany batch, bypassing the unit of work
+    
+    :param session: session within which insert occurs
+    :param model: table model
+    :param mappings: list of {column:value, ...} dicts, all with the same keys
+    '''
+    if mappings:
+        session.execute(model.__table__.insert(), mappings)
+
+#----------------------------------------------------------------------
+def bulkupdate(session, model, mappings):
+#----------------------------------------------------------------------
+    '''
+    update many rows by id in one executemany batch, bypassing the unit of work
+    
+    :param session: session within which update occurs
+    :param model: table model
+    :param mappings: list of {'id':id, column:value, ...} dicts, all with the same keys
+    '''
+    if mappings:
+        table = model.__table__
+        update = table.update().where(table.c.id == sqlalchemy.bindparam('_id'))
+        session.execute(update, [dict([('_id',m['id'])] + [(k,v) for k,v in list(m.items()) if k != 'id']) for m in mappings])
+
+#----------------------------------------------------------------------
+def bulkdelete(session, model, ids):
+#----------------------------------------------------------------------
+    '''
+    delete many rows by id, bypassing the unit of work
+    
+    :param session: session within which delete occurs
+    :param model: table model
+    :param ids: list of ids to delete
+    :rtype: number of rows deleted
+    '''
+    # limit size of IN clause, e.g., sqlite has limit on number of parameters
+    CHUNKSIZE = 500
+    numdeleted = 0
+    for chunk in range(0,len(ids),CHUNKSIZE):
+        numdeleted += session.query(model).filter(model.id.in_(ids[chunk:chunk+CHUNKSIZE])).delete(synchronize_session=False)
+    return numdeleted
+
+#----------------------------------------------------------------------
+def flushexpunge(session, *models):
+#----------------------------------------------------------------------
+    '''
+    flush pending changes, then expunge instances of the indicated models from the session
+
+    long running updates call this periodically, so the session's identity map doesn't grow without bound
+
+    :param session: session to flush
+    :param models: table models whose instances are expunged
+    '''
+    session.flush()
+    for instance in list(session):
+        if isinstance(instance, models):
+            session.expunge(instance)
+
 ########################################################################
 class Runner(Base):
 ########################################################################
@@ -262,6 +325,8 @@ class Runner(Base):
 
     __table_args__ = (UniqueConstraint('name', 'dateofbirth'),)
     results = relationship("RaceResult", backref='runner', cascade="all, delete, delete-orphan")
+    namematches = relationship("NameMatch", backref='runner', cascade="all, delete, delete-orphan")
+    seasons = relationship("RunnerSeason", backref='runner', cascade="all, delete, delete-orphan")
 
     #----------------------------------------------------------------------
     def __init__(self, name, dateofbirth, gender, hometown, member=True):
@@ -385,6 +450,7 @@ class Series(Base):
     divisions = relationship("Divisions", backref='series', cascade="all, delete, delete-orphan")
     races = relationship("RaceSeries", backref='series', cascade="all, delete, delete-orphan")
     results = relationship("RaceResult", backref='series', cascade="all, delete, delete-orphan")
+    seasons = relationship("RunnerSeason", backref='series', cascade="all, delete, delete-orphan")
 
     #----------------------------------------------------------------------
     def __init__(self, name, membersonly, overall, divisions, agegrade, orderby, hightolow, averagetie, maxraces, multiplier, maxgenpoints, maxdivpoints, maxbynumrunners):
@@ -563,6 +629,272 @@ class Divisions(Base):
     #----------------------------------------------------------------------
         return "<Divisions '%s','%s','%s',active='%s')>" % (self.seriesid, self.divisionlow, self.divisionhigh, self.active)
     
+########################################################################
+class NameMatch(Base):
+########################################################################
+    '''
+    * namematch
+        * resultname - lower case name as found in results file
+        * gender
+        * birthyearlow - inclusive low end of birth year window consistent with age in results
+        * birthyearhigh - inclusive high end of birth year window
+        * runnerid
+    
+    confirmed decisions about which runner a name in a results file refers to
+    
+    :param resultname: name as found in results file
+    :param gender: M or F
+    :param birthyearlow: inclusive low end of birth year window
+    :param birthyearhigh: inclusive high end of birth year window
+    :param runnerid: runner.id
+    '''
+    __tablename__ = 'namematch'
+    id = Column(Integer, Sequence('namematch_id_seq'), primary_key=True)
+    resultname = Column(String(50), index=True)
+    gender = Column(String(1))
+    birthyearlow = Column(Integer)
+    birthyearhigh = Column(Integer)
+    runnerid = Column(Integer, ForeignKey('runner.id'))
+    __table_args__ = (UniqueConstraint('resultname', 'gender', 'birthyearlow'),)
+
+    #----------------------------------------------------------------------
+    def __init__(self, resultname, gender, birthyearlow, birthyearhigh, runnerid):
+    #----------------------------------------------------------------------
+        
+        self.resultname = resultname.strip().lower()
+        self.gender = gender.upper()[:1]
+        self.birthyearlow = birthyearlow
+        self.birthyearhigh = birthyearhigh
+        self.runnerid = runnerid
+
+    #----------------------------------------------------------------------
+    def __repr__(self):
+    #----------------------------------------------------------------------
+        return "<NameMatch('%s','%s',birthyears='(%s,%s)',runner='%s')>" % (self.resultname, self.gender, self.birthyearlow, self.birthyearhigh, self.runnerid)
+    
+########################################################################
+class RunnerSeason(Base):
+########################################################################
+    '''
+    * runnerseason
+        * runnerid
+        * year
+        * seriesid
+        * divage - runner's age on Jan 1 of year
+        * divisionlow - inclusive age range low end for series division, None if not in a division
+        * divisionhigh - inclusive age range high end for series division
+    
+    division of a member for a season, for each series which has divisions.  These are
+    filled in for all members by :func:`divisions.updateseason`
+    
+    :param runnerid: runner.id
+    :param year: year of season
+    :param seriesid: series.id
+    :param divage: runner's age on Jan 1 of year
+    :param divisionlow: inclusive age range low end, None if not in a division
+    :param divisionhigh: inclusive age range high end, None if not in a division
+    '''
+    __tablename__ = 'runnerseason'
+    id = Column(Integer, Sequence('runnerseason_id_seq'), primary_key=True)
+    runnerid = Column(Integer, ForeignKey('runner.id'))
+    year = Column(Integer)
+    seriesid = Column(Integer, ForeignKey('series.id'))
+    divage = Column(Integer)
+    divisionlow = Column(Integer)
+    divisionhigh = Column(Integer)
+    __table_args__ = (UniqueConstraint('runnerid', 'year', 'seriesid'),
+                      Index('ix_runnerseason_division', 'year', 'seriesid', 'divisionlow', 'divisionhigh'))
+
+    #----------------------------------------------------------------------
+    def __init__(self, runnerid, year, seriesid, divage, divisionlow, divisionhigh):
+    #----------------------------------------------------------------------
+        
+        self.runnerid = runnerid
+        self.year = year
+        self.seriesid = seriesid
+        self.divage = divage
+        self.divisionlow = divisionlow
+        self.divisionhigh = divisionhigh
+
+    #----------------------------------------------------------------------
+    def __repr__(self):
+    #----------------------------------------------------------------------
+        return "<RunnerSeason('%s','%s','%s',divage='%s',division='(%s,%s)')>" % (self.runnerid, self.year, self.seriesid, self.divage, self.divisionlow, self.divisionhigh)
+    
+#----------------------------------------------------------------------
+def _birthyears(age,date):
+#----------------------------------------------------------------------
+    '''
+    return window of birth years which are consistent with age on date
+    
+    :param age: age on date
+    :param date: yyyy-mm-dd date
+    :rtype: (birthyearlow,birthyearhigh), or (None,None) if age is not known
+    '''
+    if not age:
+        return None,None
+    year = t.asc2dt(date).year
+    return year-age-1, year-age
+
+#----------------------------------------------------------------------
+def getnamematch(session,name,gender,age,date):
+#----------------------------------------------------------------------
+    '''
+    look up a confirmed match for a name found in a results file, in a single query
+    
+    :param session: database session
+    :param name: name as found in results file
+    :param gender: M or F
+    :param age: age as found in results file
+    :param date: yyyy-mm-dd date of race
+    :rtype: Runner or None if no confirmed match
+    '''
+    birthyearlow,birthyearhigh = _birthyears(age,date)
+    if birthyearlow is None or not gender:
+        return None
+    
+    # birth year windows overlap for results a year apart, so more than one match may be found, possibly for different runners
+    # the match whose window is closest to this result's wins, then the most recently confirmed
+    return session.query(Runner).join(NameMatch,NameMatch.runnerid==Runner.id) \
+                  .filter(NameMatch.resultname==name.strip().lower(),NameMatch.gender==gender.upper()[:1]) \
+                  .filter(NameMatch.birthyearlow<=birthyearhigh,NameMatch.birthyearhigh>=birthyearlow) \
+                  .order_by(sqlalchemy.func.abs(NameMatch.birthyearlow-birthyearlow),NameMatch.id.desc()) \
+                  .first()
+
+#----------------------------------------------------------------------
+def getnamematches(session,names):
+#----------------------------------------------------------------------
+    '''
+    look up the confirmed matches for many names found in a results file, e.g., a chunk of the file
+    
+    the matching runners are returned as rows rather than Runner objects, so they don't fill the session.
+    Use :func:`findnamematch` to pick the match for a result
+    
+    :param session: database session
+    :param names: list of names as found in results file
+    :rtype: {resultname:[row, ...], ...}, rows have Runner's id, name, dateofbirth, gender, member, active, and matchgender, birthyearlow, birthyearhigh, matchid from NameMatch
+    '''
+    resultnames = list(set([name.strip().lower() for name in names]))
+    
+    # limit size of IN clause, e.g., sqlite has limit on number of parameters
+    CHUNKSIZE = 500
+    namematches = {}
+    for chunk in range(0,len(resultnames),CHUNKSIZE):
+        for row in session.query(NameMatch.resultname,NameMatch.gender.label('matchgender'),NameMatch.birthyearlow,NameMatch.birthyearhigh,NameMatch.id.label('matchid'),
+                                 Runner.id,Runner.name,Runner.dateofbirth,Runner.gender,Runner.member,Runner.active) \
+                          .join(Runner,NameMatch.runnerid==Runner.id) \
+                          .filter(NameMatch.resultname.in_(resultnames[chunk:chunk+CHUNKSIZE])).all():
+            namematches.setdefault(row.resultname,[]).append(row)
+    return namematches
+
+#----------------------------------------------------------------------
+def withnamematches(session,results,skipnames,chunksize=1000): 
+#----------------------------------------------------------------------
+    '''
+    generate results with the confirmed matches for their names, which are looked up once for each chunk of results
+    
+    :param session: database session
+    :param results: iterable of results, e.g., :class:`raceresults.RaceResults`
+    :param skipnames: list of names whose confirmed matches aren't needed, e.g., names forced to be nonmembers
+    :param chunksize: number of results for which confirmed matches are looked up at once
+    :rtype: generator of (result, namematches from :func:`getnamematches`)
+    '''
+    chunk = []
+    for result in results:
+        chunk.append(result)
+        if len(chunk) >= chunksize:
+            namematches = getnamematches(session,[result['name'] for result in chunk if result['name'] not in skipnames])
+            for result in chunk:
+                yield result,namematches
+            chunk = []
+    
+    # last partial chunk
+    namematches = getnamematches(session,[result['name'] for result in chunk if result['name'] not in skipnames])
+    for result in chunk:
+        yield result,namematches
+
+#----------------------------------------------------------------------
+def findnamematch(namematches,name,gender,age,date):
+#----------------------------------------------------------------------
+    '''
+    find the confirmed match for a name found in a results file, as :func:`getnamematch` does,
+    among the matches which were looked up by :func:`getnamematches`
+    
+    :param namematches: matches from :func:`getnamematches`, which includes this name
+    :param name: name as found in results file
+    :param gender: M or F
+    :param age: age as found in results file
+    :param date: yyyy-mm-dd date of race
+    :rtype: row from :func:`getnamematches` or None if no confirmed match
+    '''
+    birthyearlow,birthyearhigh = _birthyears(age,date)
+    if birthyearlow is None or not gender:
+        return None
+    
+    gender = gender.upper()[:1]
+    candidates = [row for row in namematches.get(name.strip().lower(),[])
+                  if row.matchgender == gender and row.birthyearlow <= birthyearhigh and row.birthyearhigh >= birthyearlow]
+    if not candidates:
+        return None
+    
+    # the match whose window is closest to this result's wins, then the most recently confirmed
+    return min(candidates,key=lambda row: (abs(row.birthyearlow-birthyearlow),-row.matchid))
+
+#----------------------------------------------------------------------
+def setnamematch(session,name,gender,age,date,runnerid):
+#----------------------------------------------------------------------
+    '''
+    record a confirmed match for a name found in a results file
+    
+    :param session: database session
+    :param name: name as found in results file
+    :param gender: M or F
+    :param age: age as found in results file
+    :param date: yyyy-mm-dd date of race
+    :param runnerid: runner.id for the matching runner
+    :rtype: True if recorded or updated
+    '''
+    birthyearlow,birthyearhigh = _birthyears(age,date)
+    if birthyearlow is None or not gender:
+        return False
+    
+    namematch = NameMatch(name,gender,birthyearlow,birthyearhigh,runnerid)
+    return insert_or_update(session,NameMatch,namematch,skipcolumns=['id'],
+                            resultname=namematch.resultname,gender=namematch.gender,birthyearlow=birthyearlow)
+
+#----------------------------------------------------------------------
+def clearnamematches(session,names):
+#----------------------------------------------------------------------
+    '''
+    forget confirmed matches for names found in a results file, e.g., names which were excluded
+    
+    :param session: database session
+    :param names: list of names as found in results file
+    :rtype: number of matches removed
+    '''
+    if not names:
+        return 0
+    resultnames = list(set([name.strip().lower() for name in names]))
+    return session.query(NameMatch).filter(NameMatch.resultname.in_(resultnames)).delete(synchronize_session=False)
+
+#----------------------------------------------------------------------
+def getnonmemberids(session,names):
+#----------------------------------------------------------------------
+    '''
+    get ids of nonmember runners by name
+    
+    :param session: session within which query occurs
+    :param names: list of names
+    :rtype: {name:runnerid, ...} for names which are found
+    '''
+    # limit size of IN clause, e.g., sqlite has limit on number of parameters
+    CHUNKSIZE = 500
+    runnerids = {}
+    for chunk in range(0,len(names),CHUNKSIZE):
+        for runnerid,name in session.query(Runner.id,Runner.name).filter(Runner.name.in_(names[chunk:chunk+CHUNKSIZE]),Runner.member==False).all():
+            runnerids.setdefault(name,runnerid)
+    return runnerids
+
 #----------------------------------------------------------------------
 def main(): 
 #----------------------------------------------------------------------
@@ -29,14 +29,24 @@ raceresults  -- retrieve race results from a file
 # standard
 import pdb
 import argparse
+import operator
+import os
+import os.path
+import hashlib
+import pickle
+import mmap
+import locale
+import datetime
+import time
 
 # pypi
 
 # github
 
 # home grown
-from .config import parameterError
+from .config import parameterError, CONFIGDIR
 from . import version
+from . import xlreader
 from loutilities import textreader
 
 # fieldxform is a dict whose keys are the 'real' information we're interested in
@@ -56,9 +66,480 @@ fieldxform = {
     'state':['state','st'],
 }
 
+#----------------------------------------------------------------------
+def _compilefieldxform(fieldxform):
+#----------------------------------------------------------------------
+    '''
+    compile fieldxform into an index keyed by the first word of each match possibility,
+    so a header line can be matched against all fields in a single pass
+    
+    :param fieldxform: dict {field:[match possibility, ...]}, match possibility is string or list of strings
+    :rtype: {firstword:[(field,priority,[word, ...]), ...]}
+    '''
+    index = {}
+    for f in fieldxform:
+        for priority,m in enumerate(fieldxform[f]):
+            if isinstance(m, str):
+                m = [m]         # make single string into list
+            index.setdefault(m[0],[]).append((f,priority,m))
+    return index
+
+# compiled form of fieldxform, see RaceResults._matchhdr()
+_fieldindex = _compilefieldxform(fieldxform)
+
+# header layouts already seen, keyed by (delimited, timereqd, normalized header line)
+# value is dict with the resolved field, splitnames, foundfields, delimiters, fieldhdrs, fieldcols
+# for a given layout, so known layouts skip header detection entirely
+_hdrcache = {}
+
+# parsed results may be cached in CACHEDIR, keyed by (file contents hash, distance, timereqd, PARSERVERSION)
+# PARSERVERSION must be incremented whenever a change to parsing could change the results
+CACHEDIR = os.path.join(CONFIGDIR,'parsecache')
+PARSERVERSION = 3
+
+# parse cache files are written CACHECHUNK rows at a time as the results file is parsed, and read back the same way
+CACHECHUNK = 1000
+
+# when a file is added to the parse cache, files not used for CACHEMAXAGE days are removed, then the
+# least recently used files are removed until the cache is no bigger than CACHEMAXBYTES
+CACHEMAXAGE = 30
+CACHEMAXBYTES = 256*1024*1024
+
+# tab size used when expanding fixed width text lines, same as textreader
+TXTABSIZE = 8
+
+#----------------------------------------------------------------------
+def _filehash(filename,cachedir):
+#----------------------------------------------------------------------
+    '''
+    return the hash of a results file's contents
+    
+    the hash is remembered in cachedir by the file's device, inode, size, modification time and
+    status change time, so an unchanged file doesn't need to be read again.  The status change
+    time changes whenever the contents are written, even if the modification time is restored,
+    e.g., by cp -p
+    
+    :param filename: name of results file
+    :param cachedir: directory for parse cache
+    :rtype: hex digest
+    '''
+    filestat = os.stat(filename)
+    statkey = '{0}|{1}|{2}|{3}|{4}'.format(filestat.st_dev,filestat.st_ino,filestat.st_size,filestat.st_mtime_ns,filestat.st_ctime_ns)
+    keyfile = os.path.join(cachedir,'{0}.key'.format(hashlib.sha1(statkey.encode('utf-8')).hexdigest()))
+    try:
+        with open(keyfile,'r') as KEY:
+            filehash = KEY.read()
+        if len(filehash) == hashlib.sha1().digest_size*2:
+            return filehash
+    except IOError:
+        pass
+    
+    filehash = hashlib.sha1()
+    with open(filename,'rb') as resultsfile:
+        # empty file can't be mapped
+        if filestat.st_size:
+            with mmap.mmap(resultsfile.fileno(),0,access=mmap.ACCESS_READ) as contents:
+                filehash.update(contents)
+    filehash = filehash.hexdigest()
+    
+    # not being able to remember the hash only costs time
+    try:
+        os.makedirs(cachedir,exist_ok=True)
+        with open(keyfile,'w') as KEY:
+            KEY.write(filehash)
+    except IOError:
+        pass
+    
+    return filehash
+
+#----------------------------------------------------------------------
+def _cachename(filename,distance,timereqd,cachedir):
+#----------------------------------------------------------------------
+    '''
+    return the parse cache filename for a results file
+    
+    the file is identified by the hash of its contents, see :func:`_filehash`
+    
+    :param filename: name of results file
+    :param distance: distance for race (miles)
+    :param timereqd: as passed to :class:`RaceResults`
+    :param cachedir: directory for parse cache
+    :rtype: basename of cache file
+    '''
+    return '{0}-{1!r}-{2}-v{3}.pickle'.format(_filehash(filename,cachedir),distance,int(timereqd),PARSERVERSION)
+
+#----------------------------------------------------------------------
+def _opencache(cachefile):
+#----------------------------------------------------------------------
+    '''
+    open a parse cache file written by :class:`_ParseCacheWriter`
+    
+    rows are read CACHECHUNK at a time as they're iterated, so the whole file isn't held in memory
+    
+    :param cachefile: name of cache file
+    :rtype: ({'fields':resultfields, 'timefactor':timefactor}, row iterator), or None if not cached
+    '''
+    try:
+        cache = open(cachefile,'rb')
+    except IOError:
+        return None
+    try:
+        header = pickle.load(cache)
+    # damaged or incompatible cache file is the same as not cached, see filecache.loadcache
+    except Exception:
+        cache.close()
+        return None
+    
+    # this file was used, for pruning
+    try:
+        os.utime(cachefile)
+    except OSError:
+        pass
+    
+    def rows():
+        with cache:
+            while True:
+                try:
+                    chunk = pickle.load(cache)
+                except EOFError:
+                    return
+                for row in chunk:
+                    yield row
+    
+    return header,rows()
+
+#----------------------------------------------------------------------
+def _prunecache(cachedir):
+#----------------------------------------------------------------------
+    '''
+    remove parse cache files which are older than CACHEMAXAGE days, then the least
+    recently used files until the cache is no bigger than CACHEMAXBYTES
+    
+    :param cachedir: directory for parse cache
+    '''
+    try:
+        cachefiles = []
+        for entry in os.scandir(cachedir):
+            if entry.is_file():
+                filestat = entry.stat()
+                cachefiles.append((filestat.st_mtime,filestat.st_size,entry.path))
+        cachefiles.sort()
+        
+        oldest = time.time() - CACHEMAXAGE*24*60*60
+        totalsize = sum([size for mtime,size,path in cachefiles])
+        for mtime,size,path in cachefiles:
+            if mtime >= oldest and totalsize <= CACHEMAXBYTES:
+                break
+            os.remove(path)
+            totalsize -= size
+    # another process may be pruning at the same time, and not being able to prune only costs space
+    except OSError:
+        pass
+
+########################################################################
+class _ParseCacheWriter():
+########################################################################
+    '''
+    write the parse cache for a results file while the file is parsed
+    
+    the cache file holds pickles of {'fields':resultfields, 'timefactor':timefactor}, then of lists
+    of up to CACHECHUNK rows.  It is written to a temporary file and moved into place once the
+    results file has been completely parsed, as another process may be parsing the same file
+    
+    :param cachefile: name of cache file
+    :param results: :class:`RaceResults` being parsed
+    '''
+    #----------------------------------------------------------------------
+    def __init__(self,cachefile,results):
+    #----------------------------------------------------------------------
+        self.cachefile = cachefile
+        self.results = results
+        self.tempfile = '{0}.{1}.tmp'.format(cachefile,os.getpid())
+        self.cache = None
+        self.rows = []
+    
+    #----------------------------------------------------------------------
+    def add(self,values):
+    #----------------------------------------------------------------------
+        '''
+        add a decoded row
+        
+        :param values: list of values corresponding to the results' fields
+        '''
+        self.rows.append(values)
+        if len(self.rows) >= CACHECHUNK:
+            self._flush()
+    
+    #----------------------------------------------------------------------
+    def _flush(self):
+    #----------------------------------------------------------------------
+        '''
+        write rows which have been added
+        '''
+        try:
+            # header is written with the first rows, as timefactor is set by the first row
+            if self.cache is None:
+                os.makedirs(os.path.dirname(self.cachefile),exist_ok=True)
+                self.cache = open(self.tempfile,'wb')
+                pickle.dump({'fields':self.results._resultfields,'timefactor':self.results.timefactor},self.cache,pickle.HIGHEST_PROTOCOL)
+            if self.rows:
+                pickle.dump(self.rows,self.cache,pickle.HIGHEST_PROTOCOL)
+        # not being able to cache only costs time
+        except IOError:
+            self.abandon()
+        self.rows = []
+    
+    #----------------------------------------------------------------------
+    def finish(self):
+    #----------------------------------------------------------------------
+        '''
+        results file has been completely parsed, so move the cache file into place
+        '''
+        self._flush()
+        if self.cache is not None:
+            try:
+                self.cache.close()
+                self.cache = None
+                os.replace(self.tempfile,self.cachefile)
+            except IOError:
+                self.abandon()
+                return
+            _prunecache(os.path.dirname(self.cachefile))
+    
+    #----------------------------------------------------------------------
+    def abandon(self):
+    #----------------------------------------------------------------------
+        '''
+        results file wasn't completely parsed, so remove the partial cache file
+        '''
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+        if os.path.exists(self.tempfile):
+            os.remove(self.tempfile)
+
 # exceptions for this module.  See __init__.py for package exceptions
 class headerError(Exception): pass
 
+#----------------------------------------------------------------------
+def _intornone(value):
+#----------------------------------------------------------------------
+    '''
+    normalize a numeric field to integer
+    
+    :param value: value from the file
+    :rtype: int, or None if value is empty (0, '' or None).  ValueError raised if not a number
+    '''
+    if not value:
+        return None
+    return int(value)
+
+#----------------------------------------------------------------------
+def _tuplegetter(indexes):
+#----------------------------------------------------------------------
+    '''
+    return a function which picks items from a sequence, always as a tuple
+    
+    :param indexes: list of indexes to pick
+    :rtype: function(sequence) returning tuple
+    '''
+    # operator.itemgetter returns a bare item rather than a tuple if only one index is given
+    if len(indexes) == 1:
+        index = indexes[0]
+        return lambda seq: (seq[index],)
+    return operator.itemgetter(*indexes)
+
+########################################################################
+class ResultRecord():
+########################################################################
+    '''
+    single result retrieved from a results file by :class:`RaceResults`
+    
+    fields are available as attributes (e.g., result.name), and dict style access
+    (e.g., result['name'], 'age' in result, dict(result)) is supported for older callers.
+    Only the fields found in the file's header are present
+    
+    :param fields: tuple of generic field names, shared by all records from a file
+    :param values: values corresponding to fields
+    '''
+    __slots__ = ('_fields',) + tuple([f for f in fieldxform if f not in ['firstname','lastname']])
+    
+    #----------------------------------------------------------------------
+    def __init__(self,fields,values):
+    #----------------------------------------------------------------------
+        self._fields = fields
+        for f,v in zip(fields,values):
+            setattr(self,f,v)
+    
+    #----------------------------------------------------------------------
+    def __getitem__(self,key):
+    #----------------------------------------------------------------------
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self,key)
+    
+    #----------------------------------------------------------------------
+    def __contains__(self,key):
+    #----------------------------------------------------------------------
+        return key in self._fields
+    
+    #----------------------------------------------------------------------
+    def __iter__(self):
+    #----------------------------------------------------------------------
+        return iter(self._fields)
+    
+    #----------------------------------------------------------------------
+    def __len__(self):
+    #----------------------------------------------------------------------
+        return len(self._fields)
+    
+    #----------------------------------------------------------------------
+    def __repr__(self):
+    #----------------------------------------------------------------------
+        return '<ResultRecord({0})>'.format(', '.join(['{0}={1!r}'.format(f,getattr(self,f)) for f in self._fields]))
+    
+    #----------------------------------------------------------------------
+    def keys(self):
+    #----------------------------------------------------------------------
+        return list(self._fields)
+    
+    #----------------------------------------------------------------------
+    def get(self,key,default=None):
+    #----------------------------------------------------------------------
+        if key not in self._fields:
+            return default
+        return getattr(self,key)
+    
+
+########################################################################
+class FixedWidthReader():
+########################################################################
+    '''
+    reader for fixed width text results files, which memory maps the file
+    
+    this can be used in place of textreader.TextReader for txt files.  Until delimiters
+    are set, each line is returned as a string.  After delimiters are set, each line is
+    returned as a list of fields.  After a projection is set, only the projected columns
+    are sliced out of the line and decoded, and are returned as a tuple
+    
+    :param filename: name of file
+    '''
+    #----------------------------------------------------------------------
+    def __init__(self,filename):
+    #----------------------------------------------------------------------
+        # same encoding as used by open() in text mode
+        self.encoding = locale.getpreferredencoding(False)
+        with open(filename,'rb') as fixedwidth:
+            try:
+                self.mm = mmap.mmap(fixedwidth.fileno(),0,access=mmap.ACCESS_READ)
+            except ValueError:  # empty file can't be mapped
+                self.mm = b''
+        self.size = len(self.mm)
+        self.pos = 0
+        self.delimited = False
+        self.delimiters = None
+        self.ranges = None      # (start,end) of each projected column
+        
+    #----------------------------------------------------------------------
+    def _nextline(self):
+    #----------------------------------------------------------------------
+        '''
+        return next line from the file as bytes, including line ending
+        '''
+        if self.pos >= self.size:
+            self.close()
+            raise StopIteration
+        
+        end = self.mm.find(b'\n',self.pos)
+        end = self.size if end < 0 else end + 1
+        line = self.mm[self.pos:end]
+        self.pos = end
+        return line
+    
+    #----------------------------------------------------------------------
+    def _decode(self,line):
+    #----------------------------------------------------------------------
+        '''
+        decode line the same way textreader.TextReader reads a txt file
+        '''
+        line = line.decode(self.encoding,'replace')
+        if line.endswith('\r\n'):
+            line = line[:-2] + '\n'
+        return line.expandtabs(TXTABSIZE)
+        
+    #----------------------------------------------------------------------
+    def __next__(self):
+    #----------------------------------------------------------------------
+        line = self._nextline()
+        
+        # projected columns only
+        if self.ranges is not None:
+            # character positions are byte positions if there are no tabs or multibyte characters
+            if line.isascii() and b'\t' not in line:
+                return tuple([line[start:end].strip().decode('ascii') for start,end in self.ranges])
+            line = self._decode(line)
+            return tuple([line[start:end].strip() for start,end in self.ranges])
+        
+        line = self._decode(line)
+        if self.delimiters:
+            return self.delimit(line)
+        return line
+    
+    #----------------------------------------------------------------------
+    def close(self):
+    #----------------------------------------------------------------------
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+        self.mm = b''
+        self.size = 0
+    
+    #----------------------------------------------------------------------
+    def getdelimited(self):
+    #----------------------------------------------------------------------
+        return self.delimited
+    
+    #----------------------------------------------------------------------
+    def setdelimiter(self,delimiters):
+    #----------------------------------------------------------------------
+        '''
+        set delimiters for file
+        
+        :param delimiters: list of increasing character positions where fields start
+        '''
+        self.delimiters = delimiters
+        self.delimited = True
+    
+    #----------------------------------------------------------------------
+    def delimit(self,s):
+    #----------------------------------------------------------------------
+        '''
+        split a string based on delimiters
+        
+        :param s: string to be split
+        :rtype: list of string elements, stripped of white space
+        '''
+        return [s[start:end].strip() for start,end in self._columnranges(range(len(self.delimiters)))]
+    
+    #----------------------------------------------------------------------
+    def setprojection(self,cols):
+    #----------------------------------------------------------------------
+        '''
+        return only the indicated columns from now on
+        
+        :param cols: list of column indexes, based on delimiters
+        '''
+        self.ranges = self._columnranges(cols)
+    
+    #----------------------------------------------------------------------
+    def _columnranges(self,cols):
+    #----------------------------------------------------------------------
+        ranges = []
+        for col in cols:
+            start = self.delimiters[col]
+            end = self.delimiters[col+1] if col+1 < len(self.delimiters) else None   # last one goes to end of line
+            ranges.append((start,end))
+        return ranges
+    
 ########################################################################
 class RaceResults():
 ########################################################################
@@ -68,12 +549,11 @@ class RaceResults():
     :params filename: filename from which race results are to be retrieved
     :params distance: distance for race (miles)
     :params timereqd: default True, set to False if just looking at registration list
+    :params cachedir: directory for parse cache, e.g., CACHEDIR, for a file which will be parsed again.  Default None, no cache
     '''
     #----------------------------------------------------------------------
-    def __init__(self,filename,distance,timereqd=True):
+    def __init__(self,filename,distance,timereqd=True,cachedir=None):
     #----------------------------------------------------------------------
-        # open the textreader using the file
-        self.file = textreader.TextReader(filename)
         self.filename = filename
         self.distance = distance
         self.timereqd = timereqd
@@ -82,12 +562,66 @@ class RaceResults():
         # see self._normalizetime()
         self.timefactor = None
         
+        # if caching, and this file has been parsed before, results are served from the parse cache
+        # otherwise decoded rows are written to the cache as they're parsed
+        self._cachedrows = None
+        self._cachewriter = None
+        if cachedir:
+            cachefile = os.path.join(cachedir,_cachename(filename,distance,timereqd,cachedir))
+            cached = _opencache(cachefile)
+            if cached is not None:
+                header,self._cachedrows = cached
+                self.file = None
+                self._resultfields = header['fields']
+                self.timefactor = header['timefactor']
+                return
+            self._cachewriter = _ParseCacheWriter(cachefile,self)
+        
+        # open the textreader using the file, fixed width text files are memory mapped
+        # and excel files are streamed
+        ext = os.path.splitext(filename)[1].lower()
+        if ext == '.txt':
+            self.file = FixedWidthReader(filename)
+        elif ext in ['.xlsx','.xls']:
+            self.file = xlreader.XlReader(filename)
+        else:
+            self.file = textreader.TextReader(filename)
+        
         # self.field item value will be of form {'begin':startindex,'end':startindex+length} for easy slicing
         self.field = {}
 
         # scan to the header line
         self._findhdr()
 
+    #----------------------------------------------------------------------
+    def _matchhdr(self,line):
+    #----------------------------------------------------------------------
+        '''
+        match the words in a potential header line against fieldxform
+        
+        the highest priority match possibility found anywhere in the line wins for each field,
+        and the earliest column wins for that match possibility
+        
+        :param line: list of lowercase words in the line
+        :rtype: {field:{'start':linendx,'end':linendx+len(match),'match':match,'genfield':field}, ...}
+        '''
+        best = {}
+        for linendx in range(len(line)):
+            for f,priority,m in _fieldindex.get(line[linendx],[]):
+                # already have an earlier column for this or a higher priority match possibility
+                if f in best and best[f][0] <= priority:
+                    continue
+                # match over the end of the line is no match
+                if line[linendx:linendx+len(m)] == m:
+                    best[f] = (priority,linendx,m)
+        
+        field = {}
+        for f in best:
+            priority,linendx,m = best[f]
+            field[f] = {'start':linendx, 'end':linendx+len(m), 'match':m,
+                        'genfield':f}   # seems redundant, but [f] index is lost later in self.foundfields
+        return field
+        
     #----------------------------------------------------------------------
     def _findhdr(self):
     #----------------------------------------------------------------------
@@ -95,9 +629,7 @@ class RaceResults():
         find the header in the file
         '''
     
-        foundhdr = False
         delimited = self.file.getdelimited()
-        fields = list(fieldxform.keys())
         REQDFIELDS = ['gender','age']    # 'name' fields handled separately
         if self.timereqd:
             REQDFIELDS.append('time')
@@ -108,49 +640,24 @@ class RaceResults():
             # loop for each line until header found
             while True:
                 origline = next(self.file)
-                fieldsfound = 0
-                line = []
                 if not delimited:
-                    for word in origline.split():
-                        line.append(word.lower())
+                    line = [word.lower() for word in origline.split()]
+                    # delimiters depend on character positions, so the whole line is the key
+                    hdrkey = (delimited,self.timereqd,origline.lower())
                 else:
-                    for word in origline:
-                        line.append(str(word).lower())  # str() called in case non-string returned in origline
-                    
-                # loop for each potential self.field in a header
-                for fieldndx in range(len(fields)):
-                    f = fields[fieldndx]
-                    match = fieldxform[f]
+                    line = [str(word).lower() for word in origline]  # str() called in case non-string returned in origline
+                    hdrkey = (delimited,self.timereqd,tuple(line))
+                
+                # header layout seen before, nothing more to figure out
+                if hdrkey in _hdrcache:
+                    self._sethdr(_hdrcache[hdrkey])
+                    return
                     
-                    # loop for each match possiblity, then within the fields in file header
-                    # folding loop likes this gives precedence to the list order of the match possibilities
-                    for m in match:
-                        # loop for each column in this line, trying to find match possiblities
-                        matchfound = False
-                        for linendx in range(len(line)):                        
-                            # match over the end of the line is no match
-                            # m is either a string or a list of strings
-                            if isinstance(m, str):
-                                m = [m]         # make single string into list
-                            if linendx+len(m)>len(line):
-                                continue
-                            # if we found the match, remember start and end of match
-                            if line[linendx:linendx+len(m)] == m:
-                                if f not in self.field: self.field[f] = {}
-                                self.field[f]['start'] = linendx
-                                self.field[f]['end'] = linendx + len(m)
-                                self.field[f]['match'] = m
-                                self.field[f]['genfield'] = f   # seems redundant, but [f] index is lost later in self.foundfields
-                                fieldsfound += 1
-                                matchfound = True
-                                break   # match possibility loop
-                        
-                        # found match for this self.field
-                        if matchfound: break
+                self.field = self._matchhdr(line)
                 
                 # here we've gone through each self.field in the line
                 # need to match more than MINMATCHES to call it a header line
-                if fieldsfound >= MINMATCHES:
+                if len(self.field) >= MINMATCHES:
                     # special processing for name fields
                     if 'name' not in self.field and ('firstname' in self.field and 'lastname' in self.field):
                         self.splitnames = True
@@ -177,27 +684,29 @@ class RaceResults():
                         raise headerError('{0}: could not find fields {1} in header {2}'.format(self.filename,fieldsnotfound,origline))
                         
                     # sort found fields by order found within the line
-                    foundfields_dec = sorted([(self.field[f]['start'],self.field[f]) for f in self.field])
+                    foundfields_dec = sorted([(self.field[f]['start'],self.field[f]) for f in self.field], key=lambda ff: ff[0])
                     self.foundfields = [ff[1] for ff in foundfields_dec] # get rid of sorting decorator
                         
                     # here we have decided it is a header line
                     # if the file is not delimited, we have to find where these fields start
                     # and tell self.file where the self.field breaks are
                     # assume multi self.field matches are separated by single space
+                    delimiters = None
                     if not delimited:
                         # sort found fields by 'start' linendx (self.field number within line)
                         # loop through characters in original line, skipping over spaces within matched fields, to determine
                         # where delimiters should be
                         delimiters = []
+                        hdrline = origline.rstrip('\r\n')   # line ending is not a field
                         thischar = 0
                         foundfields_iter = iter(self.foundfields)
                         thisfield = next(foundfields_iter)
                         while True:
                             # scan past the white space
-                            while thischar < len(origline) and origline[thischar] == ' ': thischar += 1
+                            while thischar < len(hdrline) and hdrline[thischar] == ' ': thischar += 1
                             
                             # we're done looking if we're at the end of the line
-                            if thischar == len(origline): break
+                            if thischar == len(hdrline): break
                             
                             # found a word, remember where it was
                             delimiters.append(thischar)
@@ -207,7 +716,7 @@ class RaceResults():
                             if thisfield is not None:
                                 # if a match, might be multiple words.  Probably ok to assume single space between them
                                 fullmatch = ' '.join(thisfield['match'])
-                                if origline[thischar:thischar+len(fullmatch)].lower() == fullmatch:
+                                if hdrline[thischar:thischar+len(fullmatch)].lower() == fullmatch:
                                     thischar += len(fullmatch)
                                     matchfound = True
                                     try:
@@ -217,31 +726,92 @@ class RaceResults():
                             
                             # if found a match, thischar is already updated.  Otherwise, scan past this word
                             if not matchfound:
-                                while thischar < len(origline) and origline[thischar] != ' ': thischar += 1
+                                while thischar < len(hdrline) and hdrline[thischar] != ' ': thischar += 1
                             
                             # we're done looking if we're at the end of the line
-                            if thischar == len(origline): break
-                        
-                        # set up delimiters in the file reader
-                        self.file.setdelimiter(delimiters)
+                            if thischar == len(hdrline): break
                                     
                     break
 
             # header fields are in foundfields
             # need to figure out the indeces for data which correspond to the foundfields
-            self.fieldhdrs = []
-            self.fieldcols = []
+            fieldhdrs = []
+            fieldcols = []
             skipped = 0
             for f in self.foundfields:
-                self.fieldhdrs.append(f['genfield'])
+                fieldhdrs.append(f['genfield'])
                 currcol = f['start'] - skipped
-                self.fieldcols.append(currcol)
+                fieldcols.append(currcol)
                 skipped += len(f['match']) - 1  # if matched multiple columns, need to skip some
+            
+            # remember this layout for the next file which has the same header
+            layout = {'field':self.field, 'splitnames':self.splitnames, 'foundfields':self.foundfields,
+                      'delimiters':delimiters, 'fieldhdrs':fieldhdrs, 'fieldcols':fieldcols}
+            _hdrcache[hdrkey] = layout
+            self._sethdr(layout)
                 
         # not good to come here
         except StopIteration:
             raise headerError('{0}: header not found'.format(self.filename))
         
+    #----------------------------------------------------------------------
+    def _sethdr(self,layout):
+    #----------------------------------------------------------------------
+        '''
+        set up header information from a resolved header layout
+        
+        :param layout: dict as saved in _hdrcache
+        '''
+        self.field = layout['field']
+        self.splitnames = layout['splitnames']
+        self.foundfields = layout['foundfields']
+        self.fieldhdrs = list(layout['fieldhdrs'])
+        self.fieldcols = list(layout['fieldcols'])
+        
+        # set up delimiters in the file reader
+        if layout['delimiters'] is not None:
+            self.file.setdelimiter(list(layout['delimiters']))
+        
+        # rows are decoded specifically for this layout
+        self._compiledecoder()
+        
+    #----------------------------------------------------------------------
+    def _compiledecoder(self):
+    #----------------------------------------------------------------------
+        '''
+        compile the row decoder for the header layout
+        
+        the decoder is an itemgetter projection of the header's columns, plus converters
+        for the fields which need normalization, by index into the projection
+        '''
+        # project the columns associated with generic headers
+        # fixed width reader only slices and decodes the projected columns
+        if isinstance(self.file, FixedWidthReader):
+            self.file.setprojection(self.fieldcols)
+            self._ncols = len(self.fieldcols)
+            self._getcols = _tuplegetter(list(range(len(self.fieldcols))))
+        else:
+            self._ncols = max(self.fieldcols) + 1
+            self._getcols = _tuplegetter(self.fieldcols)
+        
+        # age and place are normalized to integer, rows which don't convert are skipped
+        self._converters = tuple([(ndx,_intornone) for ndx,f in enumerate(self.fieldhdrs) if f in ['age','place']])
+        
+        # time is normalized after the name check, because the first time normalized sets self.timefactor
+        self._timendx = self.fieldhdrs.index('time') if 'time' in self.fieldhdrs else None
+        
+        # if name is split, first and last names are combined into name
+        if self.splitnames:
+            self._firstndx = self.fieldhdrs.index('firstname')
+            self._lastndx = self.fieldhdrs.index('lastname')
+            keepndx = [ndx for ndx,f in enumerate(self.fieldhdrs) if f not in ['firstname','lastname']]
+            self._keepcols = _tuplegetter(keepndx)
+            self._resultfields = tuple([self.fieldhdrs[ndx] for ndx in keepndx] + ['name'])
+        else:
+            self._namendx = self.fieldhdrs.index('name')
+            self._keepcols = None
+            self._resultfields = tuple(self.fieldhdrs)
+        
     #----------------------------------------------------------------------
     def _normalizetime(self,time,distance):
     #----------------------------------------------------------------------
@@ -253,7 +823,22 @@ class RaceResults():
         
         :rtype: float time (seconds)
         '''
+        tottime = self._timeseconds(time)
+        if not self.timefactor:
+            self._settimefactor(time,tottime,distance)
+        
+        tottime *= self.timefactor
+        return tottime
+    
+    #----------------------------------------------------------------------
+    def _timeseconds(self,time):
+    #----------------------------------------------------------------------
+        '''
+        convert time field to seconds, before timefactor is applied
         
+        :param time: time field from original file
+        :rtype: float time (seconds)
+        '''
         # if string, assume hh:mm:ss or mm:ss or ss
         if type(time) in [str,str]:
             timefields = time.split(':')
@@ -268,84 +853,124 @@ class RaceResults():
             # to avoid quantization error through excel, round with epsilon of 0.00005
             tottime = round(tottime*10000)/10000.0
         
+        # xlsx time formatted cells are read as time of day or duration
+        elif isinstance(time, datetime.time):
+            tottime = time.hour*3600.0 + time.minute*60 + time.second + time.microsecond/1000000.0
+        elif isinstance(time, datetime.timedelta):
+            tottime = time.total_seconds()
+        
+        return tottime
+    
+    #----------------------------------------------------------------------
+    def _settimefactor(self,time,tottime,distance):
+    #----------------------------------------------------------------------
+        '''
+        set self.timefactor based on the time of the first runner
+        
+        :param time: time field from original file
+        :param tottime: time in seconds, from :meth:`_timeseconds`
+        :param distance: distance of the race
+        '''
         # it is possible that excel times have been put in as hh:mm accidentally
         # use timefactor to adjust this, based on the time of the first runner, and the distance
         # assume 6mm +/- 50%.  if the time doesn't fit in this range, divide by 60
         # if time still doesn't fit, ask for help (raise exception)
-        if not self.timefactor:
-            timeestimate = distance * 6.0 * 60  # 6 minute mile
-            minpace = timeestimate * 0.5
-            maxpace = timeestimate * 2.0
-            self.timefactor = 1.0
-            if tottime > maxpace:
-                self.timefactor = 1/60.0
-            if tottime*self.timefactor < minpace or tottime*self.timefactor > maxpace:
-                raise parameterError('{0}: invalid time detected - {1} ({2} secs) for {3} mile race'.format(self.filename,time,tottime,distance))
-            
-        tottime *= self.timefactor
-        return tottime
+        timeestimate = distance * 6.0 * 60  # 6 minute mile
+        minpace = timeestimate * 0.5
+        maxpace = timeestimate * 2.0
+        self.timefactor = 1.0
+        if tottime > maxpace:
+            self.timefactor = 1/60.0
+        if tottime*self.timefactor < minpace or tottime*self.timefactor > maxpace:
+            raise parameterError('{0}: invalid time detected - {1} ({2} secs) for {3} mile race'.format(self.filename,time,tottime,distance))
     
+    #----------------------------------------------------------------------
+    def __iter__(self):
+    #----------------------------------------------------------------------
+        '''
+        results are read from the file one at a time, as they are iterated
+        '''
+        return self
+        
     #----------------------------------------------------------------------
     def __next__(self):
     #----------------------------------------------------------------------
         '''
-        return dict with generic headers and associated data from file
+        return :class:`ResultRecord` with generic headers and associated data from file
+        '''
+        # serve from the parse cache if possible
+        if self._cachedrows is not None:
+            return ResultRecord(self._resultfields,next(self._cachedrows))
+        
+        try:
+            values = self._decodenext()
+        
+        # file has been completely parsed, so the cache is complete
+        except StopIteration:
+            if self._cachewriter:
+                self._cachewriter.finish()
+                self._cachewriter = None
+            raise
+        
+        # file which has an error isn't cached
+        except Exception:
+            if self._cachewriter:
+                self._cachewriter.abandon()
+                self._cachewriter = None
+            raise
+        
+        if self._cachewriter:
+            self._cachewriter.add(values)
+        return ResultRecord(self._resultfields,values)
+    
+    #----------------------------------------------------------------------
+    def _decodenext(self):
+    #----------------------------------------------------------------------
+        '''
+        decode the next valid result from the file
+        
+        :rtype: list of values corresponding to self._resultfields
         '''
         
-        # get next raw line from the file
-        # TODO: skip lines which empty text or otherwise invalid lines
-        textfound = False
-        while not textfound:
+        # get next raw line from the file, skipping lines which don't hold a valid result
+        while True:
             rawline = next(self.file)
-            textfound = True    # hope for the best
             
-            # pick columns which are associated with generic headers
-            filteredline = [rawline[i] for i in range(len(rawline)) if i in self.fieldcols]
+            # short line is treated as if the missing columns were empty
+            if len(rawline) < self._ncols:
+                rawline = list(rawline) + [None]*(self._ncols-len(rawline))
             
-            # create dict association, similar to csv.DictReader
-            result = dict(list(zip(self.fieldhdrs,filteredline)))
+            # pick columns which are associated with generic headers
+            values = list(self._getcols(rawline))
             
-            # special processing for age - normalize to integer
-            if 'age' in result and result['age'] is not None:
-                if not result['age']: # 0 or ''
-                    result['age'] = None
-                else:
-                    try:
-                        result['age'] = int(result['age'])
-                    except ValueError:
-                        textfound = False
-                        continue
-                
-            # special processing for place - normalize to integer
-            if 'place' in result and result['place'] is not None:
-                if not result['place']:  # 0 or ''
-                    result['place'] = None
-                else:
-                    try:
-                        result['place'] = int(result['place'])
-                    except ValueError:
-                        textfound = False
-                        continue
+            # normalize age and place
+            try:
+                for ndx,convert in self._converters:
+                    values[ndx] = convert(values[ndx])
+            except ValueError:
+                continue
                 
             # special processing if name is split, to combine first, last names
             if self.splitnames:
-                first = result.pop('firstname').strip()
-                last = result.pop('lastname').strip()
-                result['name'] = ' '.join([first,last])
+                name = ' '.join([values[self._firstndx].strip(),values[self._lastndx].strip()])
+            else:
+                name = values[self._namendx]
                 
             # look for some obvious errors in name
-            if result['name'] is None or result['name'][0] in '=-/!':
-                textfound = False
+            if not name or name[0] in '=-/!':
                 continue
             
             # TODO: add normalization for gender
             
             # add normalization for race time (e.g., convert hours to minutes if misuse of excel)
-            if 'time' in result:
-                result['time'] = self._normalizetime(result['time'],self.distance)
-        
-        # and return result
-        return result
+            if self._timendx is not None:
+                values[self._timendx] = self._normalizetime(values[self._timendx],self.distance)
+            
+            if self.splitnames:
+                values = list(self._keepcols(values)) + [name]
+            
+            # and return result
+            return values
     
 #----------------------------------------------------------------------
 def main(): # TODO: Update this for testing
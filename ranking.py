@@ -0,0 +1,152 @@
+#!/usr/bin/python
+###########################################################################################
+#   ranking - assign places to results
+#
+#       Date            Author          Reason
+#       ----            ------          ------
+#       10/19/26        Lou King        Create
+#
+#   Copyright 2026 Lou King
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+###########################################################################################
+'''
+ranking - assign places to results
+===========================================
+
+Results are sorted once for a given value (e.g., time), and places can then be
+assigned for any grouping of the results (e.g., overall, by gender, by division)
+in a single pass over the sorted results.
+
+Results whose values render the same are tied, e.g., times which are displayed
+the same at the precision used for the race distance.  Tied results get the same place,
+either the place of the first of them, or if averagetie is set, the average of
+the places they span.
+'''
+
+# standard
+import pdb
+import argparse
+
+# pypi
+
+# github
+
+# other
+
+# home grown
+from . import version
+
+########################################################################
+class Ranking():
+########################################################################
+    '''
+    sorted order and tie keys for a list of values
+
+    :param values: list of values to rank by, lower is better.  None is not ranked
+    :param tiekey: function(value) which gives key to detect ties, default is value itself
+    '''
+    #----------------------------------------------------------------------
+    def __init__(self,values,tiekey=None):
+    #----------------------------------------------------------------------
+        self.numvalues = len(values)
+
+        # sort once, tie keys are calculated once for each value
+        self.order = sorted([ndx for ndx in range(len(values)) if values[ndx] is not None], key=lambda ndx: values[ndx])
+        if tiekey:
+            self.tiekeys = [tiekey(values[ndx]) for ndx in self.order]
+        else:
+            self.tiekeys = [values[ndx] for ndx in self.order]
+
+    #----------------------------------------------------------------------
+    def places(self,groups=None,averagetie=False):
+    #----------------------------------------------------------------------
+        '''
+        assign places within groups
+
+        :param groups: list of group keys, in same order as values, default is all in one group.  None is not ranked
+        :param averagetie: if True, tied results get the average of the places they span
+        :rtype: list of places, in same order as values.  None if not ranked
+        '''
+        places = [None] * self.numvalues
+
+        # for each group, number placed so far and the tie group currently being collected
+        numplaced = {}
+        tiekey = {}
+        tied = {}
+
+        #----------------------------------------------------------------------
+        def settied(group):
+        #----------------------------------------------------------------------
+            thistied = tied[group]
+            thisplace = numplaced[group] - len(thistied) + 1
+            lasttie = numplaced[group]
+            if len(thistied) > 1 and averagetie:
+                place = (thisplace+lasttie) / 2.0
+            else:
+                place = thisplace
+            for ndx in thistied:
+                places[ndx] = place
+
+        for sortndx in range(len(self.order)):
+            ndx = self.order[sortndx]
+            group = groups[ndx] if groups is not None else True
+            if group is None: continue
+
+            thistiekey = self.tiekeys[sortndx]
+            if group in tied and tiekey[group] == thistiekey:
+                tied[group].append(ndx)
+            else:
+                if group in tied:
+                    settied(group)
+                tiekey[group] = thistiekey
+                tied[group] = [ndx]
+            numplaced[group] = numplaced.get(group,0) + 1
+
+        # last tie group in each group still needs to be set
+        for group in tied:
+            # numplaced[group] is already at the end of the group
+            settied(group)
+
+        return places
+
+#----------------------------------------------------------------------
+def rank(values,groups=None,tiekey=None,averagetie=False):
+#----------------------------------------------------------------------
+    '''
+    convenience function to assign places for a single grouping
+
+    :param values: list of values to rank by, lower is better.  None is not ranked
+    :param groups: list of group keys, in same order as values, default is all in one group.  None is not ranked
+    :param tiekey: function(value) which gives key to detect ties, default is value itself
+    :param averagetie: if True, tied results get the average of the places they span
+    :rtype: list of places, in same order as values.  None if not ranked
+    '''
+    return Ranking(values,tiekey).places(groups,averagetie)
+
+#----------------------------------------------------------------------
+def main():
+#----------------------------------------------------------------------
+    parser = argparse.ArgumentParser(version='{0} {1}'.format('runningclub',version.__version__))
+    parser.add_argument('values',help='values to rank',type=float,nargs='+')
+    parser.add_argument('-a','--averagetie',help='average the places of tied values',action='store_true')
+    args = parser.parse_args()
+
+    print(rank(args.values,averagetie=args.averagetie))
+
+# ##########################################################################################
+#	__main__
+# ##########################################################################################
+if __name__ == "__main__":
+    main()
@@ -784,47 +784,80 @@ class StandingsRenderer():
         self.maxraces = maxraces
         self.maxbynumrunners = maxbynumrunners
         
+        # results for the series, see getresults()
+        self.results = None
+        
+    #----------------------------------------------------------------------
+    def getresults(self): 
+    #----------------------------------------------------------------------
+        '''
+        collect the results for all the races in this series with a single query
+        
+        results are ordered by the orderby field within each race and gender
+        
+        :rtype: {(raceid,gender):[result,...], ...}, each result has the RaceResult columns needed for standings, plus runner's name
+        '''
+        orderby = self.orderby.desc() if self.hightolow else self.orderby
+        query = self.session.query(racedb.RaceResult.raceid,racedb.RaceResult.gender,racedb.RaceResult.divisionlow,racedb.RaceResult.divisionhigh,
+                                   racedb.RaceResult.genderplace,racedb.RaceResult.divisionplace,racedb.RaceResult.agtimeplace,racedb.RaceResult.agpercent,
+                                   racedb.RaceResult.runnerid,racedb.Runner.name) \
+                            .join(racedb.Race,racedb.Race.id==racedb.RaceResult.raceid) \
+                            .join(racedb.Runner,racedb.Runner.id==racedb.RaceResult.runnerid) \
+                            .filter(racedb.RaceResult.seriesid==self.series.id,racedb.Race.active==True) \
+                            .order_by(racedb.Race.racenum,racedb.Race.id,racedb.RaceResult.gender,orderby,racedb.RaceResult.id)
+        
+        # group in memory by race and gender
+        results = {}
+        for result in query.all():
+            results.setdefault((result.raceid,result.gender),[]).append(result)
+        return results
+        
     #----------------------------------------------------------------------
     def collectstandings(self,racesprocessed,gen,raceid,byrunner,divrunner): 
     #----------------------------------------------------------------------
         '''
         collect standings for this race / series
         
-        in byrunner[name][type], points{race} entries are set to '' for race not run, to 0 for race run but no points given
+        in byrunner[runnerid][type], points{race} entries are set to '' for race not run, to 0 for race run but no points given
+        
+        the results for all the races in the series are retrieved when the first race is collected, see :meth:`getresults`
         
         :param racesprocessed: number of races processed so far
         :param gen: gender, M or F
         :param raceid: race.id to collect standings for
-        :param byrunner: dict updated as runner standings are collected {name:{'bygender':[points1,points2,...],'bydivision':[points1,points2,...]}}
-        :param divrunner: dict updated with runner names by division {div:[runner1,runner2,...],...}
+        :param byrunner: dict updated as runner standings are collected {runnerid:{'name':name,'bygender':[points1,points2,...],'bydivision':[points1,points2,...]}}
+        :param divrunner: dict updated with runner ids by division {div:[runnerid1,runnerid2,...],...}
         :rtype: number of standings processed for this race / series
         '''
         numresults = 0
     
-        # get all the results currently in the database
-        # byrunner = {name:{'bygender':[points,points,...],'bydivision':[points,points,...]}, ...}
-        allresults = self.session.query(racedb.RaceResult).order_by(self.orderby).filter_by(raceid=raceid,seriesid=self.series.id,gender=gen).all()
-        if self.hightolow: allresults.sort(reverse=True)
+        # get all the results for this race and gender
+        # byrunner = {runnerid:{'name':name,'bygender':[points,points,...],'bydivision':[points,points,...]}, ...}
+        # runners are tracked by id, so different runners with the same name are kept separate
+        if self.results is None:
+            self.results = self.getresults()
+        allresults = self.results.get((raceid,gen),[])
         
         for resultndx in range(len(allresults)):
             numresults += 1
             result = allresults[resultndx]
             
-            # add runner name 
-            name = result.runner.name
-            if name not in byrunner:
-                byrunner[name] = {}
-                byrunner[name]['bygender'] = []
+            # add runner
+            runnerid = result.runnerid
+            if runnerid not in byrunner:
+                byrunner[runnerid] = {}
+                byrunner[runnerid]['name'] = result.name
+                byrunner[runnerid]['bygender'] = []
                 if self.bydiv:
-                    if name not in divrunner[(result.divisionlow,result.divisionhigh)]:
-                        divrunner[(result.divisionlow,result.divisionhigh)].append(name)
-                    byrunner[name]['bydivision'] = []
+                    if runnerid not in divrunner[(result.divisionlow,result.divisionhigh)]:
+                        divrunner[(result.divisionlow,result.divisionhigh)].append(runnerid)
+                    byrunner[runnerid]['bydivision'] = []
             
             # for this runner, catch 'bygender' and 'bydivision' up to current race position
-            while len(byrunner[name]['bygender']) < racesprocessed:
-                byrunner[name]['bygender'].append('')
+            while len(byrunner[runnerid]['bygender']) < racesprocessed:
+                byrunner[runnerid]['bygender'].append('')
                 if self.bydiv:
-                    byrunner[name]['bydivision'].append('')
+                    byrunner[runnerid]['bydivision'].append('')
                     
             # accumulate points for this result
             # if result is ordered by time, genderplace and divisionplace may be used
@@ -841,10 +874,10 @@ class StandingsRenderer():
                 else:
                     genpoints = self.multiplier*result.genderplace
                 
-                byrunner[name]['bygender'].append(max(genpoints,0))
+                byrunner[runnerid]['bygender'].append(max(genpoints,0))
                 if self.bydiv:
                     divpoints = self.multiplier*(self.maxdivpoints+1-result.divisionplace)
-                    byrunner[name]['bydivision'].append(max(divpoints,0))
+                    byrunner[runnerid]['bydivision'].append(max(divpoints,0))
             
             # if result was ordered by agpercent, agpercent is used -- assume no divisions
             elif self.orderby == racedb.RaceResult.agpercent:
@@ -863,10 +896,10 @@ class StandingsRenderer():
                 #else:
                 genpoints = int(round(self.multiplier*result.agpercent))
                 
-                byrunner[name]['bygender'].append(max(genpoints,0))
+                byrunner[runnerid]['bygender'].append(max(genpoints,0))
                 #if self.bydiv:
                 #    divpoints = self.multiplier*(self.maxdivpoints+1-result.divisionplace)
-                #    byrunner[name]['bydivision'].append(max(divpoints,0))
+                #    byrunner[runnerid]['bydivision'].append(max(divpoints,0))
             
             # if result is ordered by agtime, agtimeplace may be used -- assume no divisions
             elif self.orderby == racedb.RaceResult.agtime:
@@ -882,10 +915,10 @@ class StandingsRenderer():
                 else:
                     genpoints = self.multiplier*result.agtimeplace
                 
-                byrunner[name]['bygender'].append(max(genpoints,0))
+                byrunner[runnerid]['bygender'].append(max(genpoints,0))
                 #if self.bydiv:
                 #    divpoints = self.multiplier*(self.maxdivpoints+1-result.divisionplace)
-                #    byrunner[name]['bydivision'].append(max(divpoints,0))
+                #    byrunner[runnerid]['bydivision'].append(max(divpoints,0))
                 #
             else:
                 raise parameterError('results must be ordered by time, agtime or agpercent')
@@ -915,6 +948,9 @@ class StandingsRenderer():
         firstrace = self.session.query(racedb.Race).filter_by(active=True).order_by(racedb.Race.racenum).first()
         year = firstrace.year
         
+        # pick up active races for this series, in racenum order
+        races = self.session.query(racedb.Race).filter_by(active=True).join("series").filter_by(seriesid=self.series.id,active=True).order_by(racedb.Race.racenum).all()
+        
         # process each gender
         for gen in ['F','M']:
             # open file, prepare header, etc
@@ -929,10 +965,10 @@ class StandingsRenderer():
                 for div in divisions:
                     divrunner[div] = []
                 
-            # pick up active races for this series, in racenum order
+            # collect standings for each race, in racenum order
             racesprocessed = 0
             racenums = []
-            for race in self.session.query(racedb.Race).filter_by(active=True).join("series").filter_by(seriesid=self.series.id,active=True).order_by(racedb.Race.racenum):
+            for race in races:
                 # skip races not included in this series (note race.series points at raceseries table)
                 #if self.series.id not in [s.seriesid for s in race.series]: continue
                 self.collectstandings(racesprocessed,gen,race.id,byrunner,divrunner)
@@ -958,26 +994,26 @@ class StandingsRenderer():
                     
                     # calculate runner total points
                     bypoints = []
-                    for name in divrunner[div]:
+                    for runnerid in divrunner[div]:
                         # convert each race result to int if possible
-                        byrunner[name]['bydivision'] = [int(r) if isinstance(r, float) and r==int(r) else r for r in byrunner[name]['bydivision']]
-                        racetotals = byrunner[name]['bydivision'][:]    # make a copy
-                        racetotals.sort(reverse=True)
+                        byrunner[runnerid]['bydivision'] = [int(r) if isinstance(r, float) and r==int(r) else r for r in byrunner[runnerid]['bydivision']]
+                        racetotals = byrunner[runnerid]['bydivision'][:]    # make a copy
                         # total numbers only, and convert to int if possible
                         racetotals = [r for r in racetotals if type(r) in [int,float]]
+                        racetotals.sort(reverse=True)
                         racesused = racetotals[:min(self.maxraces,len(racetotals))]
-                        byrunner[name]['racesused'] = racesused[:]  # NOTE: this field will be reinitialized for overall / gender standings
+                        byrunner[runnerid]['racesused'] = racesused[:]  # NOTE: this field will be reinitialized for overall / gender standings
                         totpoints = sum(racesused)
                         # render as integer if result same as integer
                         totpoints = int(totpoints) if totpoints == int(totpoints) else totpoints
-                        bypoints.append((totpoints,name))
+                        bypoints.append((totpoints,byrunner[runnerid]['name'],runnerid))
                     
                     # sort runners within division by total points and render
                     bypoints.sort(reverse=True)
                     thisplace = 1
                     lastpoints = -999
                     for runner in bypoints:
-                        totpoints,name = runner
+                        totpoints,name,runnerid = runner
                         fh.clearline(gen)
                         
                         # render place if it's different than last runner's place, else there was a tie
@@ -994,11 +1030,11 @@ class StandingsRenderer():
                         
                         # render race results
                         iracenums = iter(racenums)
-                        for pts in byrunner[name]['bydivision']:
+                        for pts in byrunner[runnerid]['bydivision']:
                             racenum = next(iracenums)
-                            if pts in byrunner[name]['racesused']:
+                            if pts in byrunner[runnerid]['racesused']:
                                 fh.setrace(gen,racenum,pts)
-                                byrunner[name]['racesused'].remove(pts)
+                                byrunner[runnerid]['racesused'].remove(pts)
                             else:
                                 fh.setrace(gen,racenum,pts,stylename='race-dropped')
                         fh.render(gen)
@@ -1014,25 +1050,25 @@ class StandingsRenderer():
             
             # calculate runner total points
             bypoints = []
-            for name in byrunner:
+            for runnerid in byrunner:
                 # convert each race result to int if possible
-                byrunner[name]['bygender'] = [int(r) if isinstance(r, float) and r==int(r) else r for r in byrunner[name]['bygender']]
-                racetotals = byrunner[name]['bygender'][:]    # make a copy
-                racetotals.sort(reverse=True)
+                byrunner[runnerid]['bygender'] = [int(r) if isinstance(r, float) and r==int(r) else r for r in byrunner[runnerid]['bygender']]
+                racetotals = byrunner[runnerid]['bygender'][:]    # make a copy
                 # total numbers only, and convert to int if possible
                 racetotals = [r for r in racetotals if type(r) in [int,float]]
+                racetotals.sort(reverse=True)
                 racesused = racetotals[:min(self.maxraces,len(racetotals))]
-                byrunner[name]['racesused'] = racesused[:]  # NOTE: this field will be reinitialized for overall / gender standings
+                byrunner[runnerid]['racesused'] = racesused[:]  # NOTE: this field will be reinitialized for overall / gender standings
                 totpoints = sum(racesused)
                 totpoints = int(totpoints) if totpoints == int(totpoints) else totpoints
-                bypoints.append((totpoints,name))
+                bypoints.append((totpoints,byrunner[runnerid]['name'],runnerid))
             
             # sort runners by total points and render
             bypoints.sort(reverse=True)
             thisplace = 1
             lastpoints = -999
             for runner in bypoints:
-                totpoints,name = runner
+                totpoints,name,runnerid = runner
                 fh.clearline(gen)
                         
                 # render place if it's different than last runner's place, else there was a tie
@@ -1049,11 +1085,11 @@ class StandingsRenderer():
                 
                 # render race results
                 iracenums = iter(racenums)
-                for pts in byrunner[name]['bygender']:
+                for pts in byrunner[runnerid]['bygender']:
                     racenum = next(iracenums)
-                    if pts in byrunner[name]['racesused']:
+                    if pts in byrunner[runnerid]['racesused']:
                         fh.setrace(gen,racenum,pts)
-                        byrunner[name]['racesused'].remove(pts)
+                        byrunner[runnerid]['racesused'].remove(pts)
                     else:
                         fh.setrace(gen,racenum,pts,stylename='race-dropped')
                 fh.render(gen)
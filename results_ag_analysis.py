@@ -37,10 +37,11 @@ from os.path import join as pathjoin
 
 # home grown
 from . import version
+from . import divisions
 from loutilities.transform import Transform
 from loutilities.timeu import asctime, age
 from datetime import date
-from collections import defaultdict, OrderedDict
+from collections import defaultdict
 
 # time stuff
 tymd = asctime('%Y-%m-%d')
@@ -70,50 +71,6 @@ class Result():
 #######################################################################
     pass
 
-#######################################################################
-class AgeRange():
-#######################################################################
-    #----------------------------------------------------------------------
-    def __init__(self, rangestr):
-    #----------------------------------------------------------------------
-        rangedef = rangestr.split(',')
-        initrange = tuple([int(x) for x in rangedef[0].split('-')])
-        rangedelta = int(rangedef[1])
-        lastage = int(rangedef[2])
-
-        self.ranges = OrderedDict([(initrange, '{}-{}'.format(initrange[0], initrange[1]))])
-        
-        nextage = initrange[1]+1
-        while( nextage < lastage ):
-            rangestart = nextage
-            rangeend   = nextage + rangedelta - 1
-            if rangeend >= lastage:
-                rangeend = lastage-1
-            thisrange = tuple([rangestart, rangeend])
-            self.ranges[thisrange] = '{}-{}'.format(thisrange[0], thisrange[1])
-
-            nextage += rangedelta
-        
-        # last range
-        lastrange = tuple([lastage,199])
-        self.ranges[lastrange] = '{}+'.format(lastage)
-
-    #----------------------------------------------------------------------
-    def __call__(self, age):
-    #----------------------------------------------------------------------
-        # return the range string associated with this age
-        for thisgroup in self.ranges:
-            if age in range(thisgroup[0], thisgroup[1]+1):
-                return self.ranges[thisgroup]
-
-        # age not found
-        return None
-
-    #----------------------------------------------------------------------
-    def getranges(self):
-    #----------------------------------------------------------------------
-        return self.ranges
-
 #----------------------------------------------------------------------
 def parsefilter(thisfilter):
 #----------------------------------------------------------------------
@@ -153,7 +110,7 @@ def analyze(details, summarybase, mindist, maxdist, yearfilter, agfilter, ranged
     agfilters = parsefilter(agfilter)
 
     # set up age ranges
-    agerange = AgeRange(rangedef)
+    agerange = divisions.DivisionMap.fromspec(rangedef)
 
     # open input file
     _DETAILS = open(details,'r',newline='')
@@ -53,6 +53,8 @@ setup(
         'runningclub/importmembers.py',
         'runningclub/importraces.py',
         'runningclub/importresults.py',
+        'runningclub/importseason.py',
+        'runningclub/ingestresults.py',
         'runningclub/listraces.py',
         'runningclub/racingteamresults.py',
         'runningclub/rcadminapprove.py',
@@ -71,7 +73,13 @@ setup(
     install_requires = [
         #'loutilities>=0.5.0',
         'xlrd>=0.8.0',
+        'openpyxl>=2.6',
         ],
+    
+    # optional C accelerated name matching, see clubmember.RapidfuzzScorer
+    extras_require = {
+        'fast': ['rapidfuzz'],
+        },
 
     # If any package contains any of these file types, include them:
     data_files = ([
@@ -96,7 +104,10 @@ setup(
             'importmembers = runningclub.importmembers:main',
             'importraces = runningclub.importraces:main',
             'importresults = runningclub.importresults:main',
+            'importseason = runningclub.importseason:main',
+            'ingestresults = runningclub.ingestresults:main',
             'listraces = runningclub.listraces:main',
+            'namematches = runningclub.namematches:main',
             'racingteamresults = runningclub.racingteamresults:main',
             'rcadminapprove = runningclub.rcadminapprove:main',
             'rcadminconfig = runningclub.rcadminconfig:main',
@@ -50,6 +50,7 @@ from loutilities.csvwt import wlist
 from loutilities import apikey
 
 from . import version
+from . import divisions
 
 class invalidParameter(): pass
 
@@ -160,6 +161,11 @@ def members2file(memberfileh, mapping, outfile=None, currentmembers=True):
 
     return memberlist
 
+# this must match grand prix configuration in membership database
+# TODO: add api to query this information from scoretility
+GRANDPRIXDIVISIONS = divisions.DivisionMap([(0,13),(14,29),(30,39),(40,49),(50,59),(60,69),(70,divisions.OPENAGE)],
+                                           ['13 and under','14-29','30-39','40-49','50-59','60-69','70 and over'])
+
 #----------------------------------------------------------------------
 def _getdivision(member):
 #----------------------------------------------------------------------
@@ -173,28 +179,15 @@ def _getdivision(member):
     # use local time
     today = time.time()-time.timezone
     todaydt = timeu.epoch2dt(today)
-    jan1 = datetime(todaydt.year, 1, 1)
-
-    memberage = timeu.age(jan1, ymd.asc2dt(member.dob))
-
-    # this must match grand prix configuration in membership database
-    # TODO: add api to query this information from scoretility
-    if memberage <= 13:
-        div = '13 and under'
-    elif memberage <= 29:
-        div = '14-29'
-    elif memberage <= 39:
-        div = '30-39'
-    elif memberage <= 49:
-        div = '40-49'
-    elif memberage <= 59:
-        div = '50-59'
-    elif memberage <= 69:
-        div = '60-69'
-    else:
-        div = '70 and over'
 
-    return div
+    # members here are RunningAHEAD records rather than runners in the race database,
+    # so the division age is computed the same way as for racedb.RunnerSeason
+    memberage = divisions.divage(member.dob, todaydt.year)
+    if memberage is None:
+        return None
+
+    # negative age (date of birth in the future) falls in youngest division
+    return GRANDPRIXDIVISIONS(max(memberage,0))
 
 
 #----------------------------------------------------------------------
@@ -0,0 +1,177 @@
+#!/usr/bin/python
+###########################################################################################
+#   xlreader - stream rows from excel files
+#
+#       Date            Author          Reason
+#       ----            ------          ------
+#       10/19/26        Lou King        Create
+#
+#   Copyright 2026 Lou King
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+###########################################################################################
+'''
+xlreader - stream rows from excel files
+===========================================
+
+Rows are read directly from the first sheet of the workbook, without converting the
+workbook to csv.  xlsx files are opened in openpyxl's read only mode, so rows are
+parsed as they are iterated.  xls files are opened with xlrd on_demand, so only the
+first sheet is loaded.
+
+Spreadsheets often report a used range well past the data, e.g., because empty cells
+were formatted.  Reading stops after BLANKROWLIMIT consecutive empty rows.
+'''
+
+# standard
+import pdb
+import argparse
+import os.path
+
+# pypi
+
+# github
+
+# other
+
+# home grown
+from .config import parameterError
+from . import version
+
+# this many consecutive empty rows is taken to be the end of the data
+BLANKROWLIMIT = 50
+
+########################################################################
+class XlReader():
+########################################################################
+    '''
+    stream rows from the first sheet of an xlsx or xls file
+
+    this can be used in place of loutilities.textreader.TextReader for excel files.
+    Each row is returned as a list of cell values, empty cells are None for xlsx and ''
+    for xls
+
+    :param filename: name of xlsx or xls file
+    '''
+    #----------------------------------------------------------------------
+    def __init__(self,filename):
+    #----------------------------------------------------------------------
+        ext = os.path.splitext(filename)[1].lower()
+        if ext == '.xlsx':
+            from openpyxl import load_workbook
+            self.workbook = load_workbook(filename,read_only=True,data_only=True)
+            self.rows = self.workbook.worksheets[0].iter_rows(values_only=True)
+            self._release = self.workbook.close
+        elif ext == '.xls':
+            from xlrd import open_workbook
+            self.workbook = open_workbook(filename,on_demand=True)
+            sheet = self.workbook.sheet_by_index(0)
+            self.rows = (sheet.row_values(rownum) for rownum in range(sheet.nrows))
+            self._release = self.workbook.release_resources
+        else:
+            raise parameterError('{0}: excel file must be xlsx or xls'.format(filename))
+
+        self.blankrows = 0
+        self.opened = True
+
+    #----------------------------------------------------------------------
+    def __iter__(self):
+    #----------------------------------------------------------------------
+        return self
+
+    #----------------------------------------------------------------------
+    def __next__(self):
+    #----------------------------------------------------------------------
+        '''
+        read next row from the sheet
+        raises StopIteration at the end of the data
+
+        :rtype: list of cells for the current row
+        '''
+        if not self.opened:
+            raise StopIteration
+
+        try:
+            row = next(self.rows)
+        except StopIteration:
+            self.close()
+            raise
+
+        # a long run of empty rows is the end of the data
+        if all([cell is None or cell == '' for cell in row]):
+            self.blankrows += 1
+            if self.blankrows >= BLANKROWLIMIT:
+                self.close()
+                raise StopIteration
+        else:
+            self.blankrows = 0
+
+        return list(row)
+
+    #----------------------------------------------------------------------
+    def close(self):
+    #----------------------------------------------------------------------
+        '''
+        release the workbook
+        '''
+        if self.opened:
+            self.opened = False
+            self._release()
+
+    #----------------------------------------------------------------------
+    def getdelimited(self):
+    #----------------------------------------------------------------------
+        '''
+        rows are already broken into columns
+
+        :rtype: True
+        '''
+        return True
+
+    #----------------------------------------------------------------------
+    def setdelimiter(self,delimiters):
+    #----------------------------------------------------------------------
+        raise parameterError('cannot set delimiters for excel file')
+
+    #----------------------------------------------------------------------
+    def dictrows(self):
+    #----------------------------------------------------------------------
+        '''
+        generate rows as dicts keyed by the first row, similar to csv.DictReader
+
+        :rtype: generator of {header:cell, ...}
+        '''
+        try:
+            hdr = [cell if cell is not None else '' for cell in next(self)]
+        except StopIteration:
+            return
+
+        for row in self:
+            yield dict(zip(hdr,row))
+
+#----------------------------------------------------------------------
+def main():
+#----------------------------------------------------------------------
+    parser = argparse.ArgumentParser(version='{0} {1}'.format('runningclub',version.__version__))
+    parser.add_argument('filename',help='xlsx or xls file')
+    args = parser.parse_args()
+
+    for row in XlReader(args.filename):
+        print(row)
+
+# ##########################################################################################
+#	__main__
+# ##########################################################################################
+if __name__ == "__main__":
+    main()